@@ -1,12 +1,13 @@
 """Public package API for the mpipy runtime."""
 
 from .config import configure_infra, get_config
-from .runtime import COMM_WORLD, cancel_job, cancel_requested, init, raise_if_cancelled, run
+from .runtime import COMM_WORLD, cancel_job, cancel_requested, get_comm_world, init, raise_if_cancelled, run
 
 __all__ = [
     "configure_infra",
     "get_config",
     "COMM_WORLD",
+    "get_comm_world",
     "init",
     "run",
     "cancel_job",
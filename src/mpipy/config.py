@@ -5,6 +5,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Iterable, List, Optional
 
+from .protocol import lz4_available
+
 #we instantiate the class as InfraConfig, take in and validate user inputs via 'def configure_infra()'
 #and then we use that data to build and instance of the InfraConfig class in 'cfg'
 
@@ -13,7 +15,7 @@ from typing import Iterable, List, Optional
 class InfraConfig:
     master_node: str
     per_node_cores: int
-    per_node_threads: Optional[int] #rm this 
+    per_node_threads: Optional[int] # total hardware threads per node; split evenly across its ranks
     num_worker_nodes: int
     time_job: bool = False
     progress_to_terminal: bool = False
@@ -25,6 +27,7 @@ class InfraConfig:
     python_executable: str = "python"
     working_dir: Optional[str] = None
     connect_timeout_s: float = 10.0
+    compress: bool = False # LZ4-compress large payloads on the wire; needs the lz4 package on every node
 
 _CONFIG: Optional[InfraConfig] = None
 
@@ -46,7 +49,7 @@ def configure_infra(
     *,
     master_node: str,
     per_node_cores: int,
-    per_node_threads: Optional[int], #rm thread specs 
+    per_node_threads: Optional[int],
     num_worker_nodes: Optional[int] = None,
     time_job: bool = False,
     progress_to_terminal: bool = False,
@@ -58,6 +61,7 @@ def configure_infra(
     python_executable: str = "python",
     working_dir: Optional[str] = None,
     connect_timeout_s: float = 10.0,
+    compress: bool = False,
     ) -> InfraConfig:
     """Configure cluster/runtime settings.
 
@@ -90,6 +94,9 @@ def configure_infra(
     if host_list and len(host_list) != num_worker_nodes:
         raise ConfigError("num_worker_nodes must match number of hosts")
 
+    if compress and not lz4_available():
+        raise ConfigError("compress=True requires the lz4 package")
+
     cfg = InfraConfig(
         master_node=master_node,
         per_node_cores=per_node_cores,
@@ -105,6 +112,7 @@ def configure_infra(
         python_executable=python_executable,
         working_dir=working_dir,
         connect_timeout_s=connect_timeout_s,
+        compress=compress,
     )
 
     global _CONFIG
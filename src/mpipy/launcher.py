@@ -3,19 +3,26 @@
 from __future__ import annotations
 
 import subprocess
-import time
 
 from .config import InfraConfig
-from .transport import encode_args
 
 
 class LaunchError(RuntimeError):
     pass
 
 
+_CONTROL_OPTIONS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=/tmp/mpipy-%r@%h:%p",
+    "-o", "ControlPersist=60s",
+]
+
+
 def _ssh_prefix(cfg: InfraConfig, host: str) -> list[str]:
     user_host = f"{cfg.ssh_user}@{host}" if cfg.ssh_user else host
     cmd = ["ssh"]
+    # reuse one authenticated connection per host across ranks and jobs
+    cmd.extend(_CONTROL_OPTIONS)
     if cfg.ssh_port:
         cmd.extend(["-p", str(cfg.ssh_port)])
     if cfg.ssh_identity_file:
@@ -24,34 +31,66 @@ def _ssh_prefix(cfg: InfraConfig, host: str) -> list[str]:
     return cmd
 
 
-def launch_workers(cfg: InfraConfig, master_host: str, master_port: int, module: str, function: str, args, kwargs):
+def _threads_per_rank(cfg: InfraConfig) -> int:
+    return max(1, (cfg.per_node_threads or cfg.per_node_cores) // cfg.per_node_cores)
+
+
+def _thread_env(cfg: InfraConfig) -> dict[str, str]:
+    # without these every rank's BLAS sizes its pool to the whole node, which
+    # oversubscribes it per_node_cores times over
+    threads = str(_threads_per_rank(cfg))
+    return {
+        "OMP_NUM_THREADS": threads,
+        "OPENBLAS_NUM_THREADS": threads,
+        "MKL_NUM_THREADS": threads,
+        "OMP_PROC_BIND": "close",
+        "OMP_PLACES": "cores",
+    }
+
+
+def _host_command(cfg: InfraConfig, env: dict[str, str], ranks: range) -> str:
+    # one remote shell starts every local rank in the background, then waits on them;
+    # local rank i is pinned to cpus [i*T, (i+1)*T) when taskset exists and the node has them
+    export = " ".join(f"{k}='{v}'" for k, v in env.items())
+    python = cfg.python_executable or "python"
+    workdir = f"cd '{cfg.working_dir}' && " if cfg.working_dir else ""
+    rank_list = " ".join(str(r) for r in ranks)
+    t = _threads_per_rank(cfg)
+    return (
+        f"{workdir}export {export} && "
+        f"pin=$(command -v taskset); ncpu=$(nproc 2>/dev/null || echo 0); i=0; "
+        f"for r in {rank_list}; do "
+        f"hi=$((i*{t}+{t - 1})); p=; "
+        f"[ -n \"$pin\" ] && [ $hi -lt $ncpu ] && p=\"$pin -c $((i*{t}))-$hi\"; "
+        f"MPI_RANK=$r $p {python} -m mpipy.worker & i=$((i+1)); "
+        f"done; wait"
+    )
+
+
+def launch_workers(cfg: InfraConfig, master_host: str, master_port: int, module: str, function: str):
     if not cfg.hosts:
         raise LaunchError("hosts list is required for SSH launch")
 
-    encoded_args = encode_args(args, kwargs)
     ranks_per_node = cfg.per_node_cores
     world_size = cfg.num_worker_nodes * ranks_per_node + 1
 
+    env = {
+        "MPI_MASTER_HOST": master_host,
+        "MPI_MASTER_PORT": str(master_port),
+        "MPI_WORLD_SIZE": str(world_size),
+        "MPI_RANKS_PER_NODE": str(ranks_per_node),
+        "MPI_RUN_MODULE": module,
+        "MPI_RUN_FUNCTION": function,
+        "MPI_COMPRESS": "1" if cfg.compress else "0",
+        "MPI_CONNECT_TIMEOUT": str(cfg.connect_timeout_s),
+        **_thread_env(cfg),
+    }
     rank = 1
     for host in cfg.hosts:
-        for local_rank in range(ranks_per_node):
-            env = {
-                "MPI_MASTER_HOST": master_host,
-                "MPI_MASTER_PORT": str(master_port),
-                "MPI_WORLD_SIZE": str(world_size),
-                "MPI_RANK": str(rank),
-                "MPI_RUN_MODULE": module,
-                "MPI_RUN_FUNCTION": function,
-                "MPI_RUN_ARGS": encoded_args,
-            }
-            export = " ".join(f"{k}='{v}'" for k, v in env.items())
-            python = cfg.python_executable or "python"
-            workdir = f"cd '{cfg.working_dir}' && " if cfg.working_dir else ""
-            remote_cmd = f"{workdir}{export} {python} -m mpipy.worker"
-            cmd = _ssh_prefix(cfg, host) + [remote_cmd]
-            subprocess.Popen(cmd)
-            if cfg.progress_to_terminal:
-                print(f"[mpipy] launched rank {rank} on {host} (local {local_rank})")
-            rank += 1
-            time.sleep(0.05)
+        ranks = range(rank, rank + ranks_per_node)
+        cmd = _ssh_prefix(cfg, host) + [_host_command(cfg, env, ranks)]
+        subprocess.Popen(cmd)
+        if cfg.progress_to_terminal:
+            print(f"[mpipy] launched ranks {ranks.start}-{ranks.stop - 1} on {host}")
+        rank = ranks.stop
     return world_size
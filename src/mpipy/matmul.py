@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import math
 import os
 from typing import Optional, Tuple
@@ -9,7 +10,7 @@ from typing import Optional, Tuple
 import numpy as np
 
 from .config import get_config
-from .runtime import COMM_WORLD, LocalComm, cancel_requested, run
+from .runtime import LocalComm, cancel_requested, get_comm_world, node_of, run
 
 
 _TAG_A_BASE = 1000
@@ -27,7 +28,40 @@ def _as_2d_array(value, name: str) -> np.ndarray:
     return arr
 
 
-def _partition_ranges(n: int, parts: int) -> list[Tuple[int, int]]:
+def _accumulate_dtype(dtype: np.dtype) -> np.dtype:
+    # BLAS has no float16/bfloat16 GEMM, and numpy falls back to a generic
+    # loop ~50x slower than sgemm, so half-width floats are multiplied and
+    # summed in float32 and only stored and sent at their own width
+    dtype = np.dtype(dtype)
+    if (dtype.kind == "f" and dtype.itemsize == 2) or dtype.name == "bfloat16":
+        return np.dtype(np.float32)
+    return dtype
+
+
+def _gemm(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a @ b through BLAS, in float32 for half-width float operands."""
+    dtype = _accumulate_dtype(np.result_type(a, b))
+    return np.matmul(a.astype(dtype, copy=False), b.astype(dtype, copy=False))
+
+
+def _resolve_dtype(dtype) -> Optional[np.dtype]:
+    if dtype is None:
+        return None
+    if isinstance(dtype, str) and dtype.lower() in ("bfloat16", "bf16"):
+        try:
+            import ml_dtypes
+        except ImportError:
+            # numpy has no native bf16; the nearest narrow type still halves the bytes
+            return np.dtype(np.float32)
+        return np.dtype(ml_dtypes.bfloat16)
+    return np.dtype(dtype)
+
+
+# grid and partition layouts depend only on (m, k, n, size), so repeated
+# matmuls of one shape skip the Python prep; results are tuples so the cached
+# values cannot be mutated by callers
+@functools.lru_cache(maxsize=128)
+def _partition_ranges(n: int, parts: int) -> Tuple[Tuple[int, int], ...]:
     base = n // parts
     remainder = n % parts
     ranges: list[Tuple[int, int]] = []
@@ -37,9 +71,10 @@ def _partition_ranges(n: int, parts: int) -> list[Tuple[int, int]]:
         end = start + size
         ranges.append((start, end))
         start = end
-    return ranges
+    return tuple(ranges)
 
 
+@functools.lru_cache(maxsize=128)
 def _grid_dims(size: int) -> Tuple[int, int]:
     root = int(math.sqrt(size))
     for pr in range(root, 0, -1):
@@ -48,21 +83,67 @@ def _grid_dims(size: int) -> Tuple[int, int]:
     return 1, size
 
 
+@functools.lru_cache(maxsize=128)
+def _grid_order(pr: int, pc: int, ranks_per_node: Optional[int]) -> Tuple[int, ...]:
+    """Ranks laid out on the pr x pc grid: order[r * pc + c] sits at (r, c).
+
+    Rows are filled with ranks from a single node whenever a node has pc ranks
+    left (grid columns when only pr fits), so the per-step A (or B) panel
+    broadcasts stay on node-local links. Ranks left over fill the remaining lines.
+    """
+    size = pr * pc
+    if ranks_per_node is None:
+        return tuple(range(size))
+    if pc <= ranks_per_node:
+        line = pc
+    elif pr <= ranks_per_node:
+        line = pr
+    else:
+        return tuple(range(size))
+
+    nodes: dict[int, list[int]] = {}
+    for rank in range(size):
+        nodes.setdefault(node_of(rank, ranks_per_node), []).append(rank)
+    lines: list[list[int]] = []
+    leftover: list[int] = []
+    for ranks in nodes.values():
+        while len(ranks) >= line:
+            lines.append(ranks[:line])
+            ranks = ranks[line:]
+        leftover.extend(ranks)
+    lines.extend(leftover[i:i + line] for i in range(0, len(leftover), line))
+
+    if line == pc:
+        return tuple(rank for row in lines for rank in row)
+    return tuple(lines[cc][rr] for rr in range(pr) for cc in range(pc))
+
+
 def _matmul_impl(a: np.ndarray, b: np.ndarray, comm) -> Optional[np.ndarray]:
     a = _as_2d_array(a, "a")
     b = _as_2d_array(b, "b")
     if a.shape[1] != b.shape[0]:
         raise ValueError("incompatible matrix dimensions")
     if comm.size == 1:
-        return a @ b
+        return _gemm(a, b).astype(np.result_type(a, b), copy=False)
     return _matmul_distributed(comm, a=a, b=b)
 
 
-def _matmul_distributed(comm, a: Optional[np.ndarray], b: Optional[np.ndarray]) -> Optional[np.ndarray]:
+def _matmul_meta(a: np.ndarray, b: np.ndarray) -> Tuple[int, int, int, np.dtype]:
+    m, k = a.shape
+    _k2, n = b.shape
+    return m, k, n, np.result_type(a, b)
+
+
+def _matmul_distributed(
+    comm,
+    a: Optional[np.ndarray],
+    b: Optional[np.ndarray],
+    meta: Optional[Tuple[int, int, int, np.dtype]] = None,
+) -> Optional[np.ndarray]:
     if comm.size == 1:
         if a is None or b is None:
             return None
-        return a @ b
+        return _gemm(a, b).astype(np.result_type(a, b), copy=False)
 
     pr, pc = _grid_dims(comm.size)
 
@@ -73,43 +154,40 @@ def _matmul_distributed(comm, a: Optional[np.ndarray], b: Optional[np.ndarray])
         b = _as_2d_array(b, "b")
         if a.shape[1] != b.shape[0]:
             raise ValueError("incompatible matrix dimensions")
-        m, k = a.shape
-        _k2, n = b.shape
-        dtype = np.result_type(a, b)
     else:
         a = None
         b = None
-        m = k = n = 0
-        dtype = None
 
-    if comm.rank == 0:
-        meta = (m, k, n, dtype)
-    else:
-        meta = None
-    m, k, n, dtype = comm.bcast(meta, root=0)
+    # a launched job already carries the shapes in every rank's args
+    if meta is None:
+        meta = comm.bcast(_matmul_meta(a, b) if comm.rank == 0 else None, root=0)
+    m, k, n, dtype = meta
 
     row_ranges = _partition_ranges(m, pr)
     k_ranges = _partition_ranges(k, pc)
     col_ranges = _partition_ranges(n, pc)
 
-    r = comm.rank // pc
-    c = comm.rank % pc
+    order = _grid_order(pr, pc, getattr(comm, "ranks_per_node", None))
+    position = {rank: i for i, rank in enumerate(order)}
+    r, c = divmod(position[comm.rank], pc)
 
     row_start, row_end = row_ranges[r]
     col_start, col_end = col_ranges[c]
 
     local_rows = row_end - row_start
     local_cols = col_end - col_start
-    local_c = np.zeros((local_rows, local_cols), dtype=dtype)
+    local_c = np.zeros((local_rows, local_cols), dtype=_accumulate_dtype(dtype))
 
     local_b_blocks: dict[int, np.ndarray] = {}
     if comm.rank == 0:
+        # blocks are made contiguous in the result dtype once here, so every
+        # later panel send goes out through the raw ndarray codec without a copy
         for rr in range(pr):
             rs, re = row_ranges[rr]
             for cc in range(pc):
                 ks, ke = k_ranges[cc]
-                a_block = a[rs:re, ks:ke]
-                dest = rr * pc + cc
+                a_block = np.ascontiguousarray(a[rs:re, ks:ke], dtype=dtype)
+                dest = order[rr * pc + cc]
                 if dest == 0:
                     local_a = a_block
                 else:
@@ -119,8 +197,8 @@ def _matmul_distributed(comm, a: Optional[np.ndarray], b: Optional[np.ndarray])
             owner_row = q % pr
             for cc in range(pc):
                 cs, ce = col_ranges[cc]
-                b_block = b[ks:ke, cs:ce]
-                dest = owner_row * pc + cc
+                b_block = np.ascontiguousarray(b[ks:ke, cs:ce], dtype=dtype)
+                dest = order[owner_row * pc + cc]
                 if dest == 0:
                     local_b_blocks[q] = b_block
                 else:
@@ -132,80 +210,88 @@ def _matmul_distributed(comm, a: Optional[np.ndarray], b: Optional[np.ndarray])
             if r == owner_row:
                 local_b_blocks[q] = comm.recv(source=0, tag=_TAG_B_BASE + q)
 
+    row_ranks = [order[r * pc + cc] for cc in range(pc)]
+    col_ranks = [order[rr * pc + c] for rr in range(pr)]
+
+    def post_step(q: int):
+        a_root = order[r * pc + q]
+        a_req = comm.ibcast(local_a if c == q else None, root=a_root, ranks=row_ranks, tag=_TAG_A_STEP_BASE + q)
+        b_root = order[(q % pr) * pc + c]
+        b_req = comm.ibcast(local_b_blocks.get(q), root=b_root, ranks=col_ranks, tag=_TAG_B_STEP_BASE + q)
+        return a_req, b_req
+
+    # double-buffered SUMMA: step q+1's panels are already in flight (and step q's
+    # forwards are draining on the sender thread) while step q's GEMM runs
+    pending = post_step(0)
     for q in range(pc):
         if cancel_requested():
             return None
 
-        if c == q:
-            a_panel = local_a
-            for dest_c in range(pc):
-                if dest_c == c:
-                    continue
-                dest_rank = r * pc + dest_c
-                comm.send(a_panel, dest=dest_rank, tag=_TAG_A_STEP_BASE + q)
-        else:
-            owner_rank = r * pc + q
-            a_panel = comm.recv(source=owner_rank, tag=_TAG_A_STEP_BASE + q)
-
-        owner_row = q % pr
-        if r == owner_row:
-            b_panel = local_b_blocks[q]
-            for dest_r in range(pr):
-                if dest_r == r:
-                    continue
-                dest_rank = dest_r * pc + c
-                comm.send(b_panel, dest=dest_rank, tag=_TAG_B_STEP_BASE + q)
-        else:
-            owner_rank = owner_row * pc + c
-            b_panel = comm.recv(source=owner_rank, tag=_TAG_B_STEP_BASE + q)
+        a_req, b_req = pending
+        a_panel = a_req.wait()
+        b_panel = b_req.wait()
+        if q + 1 < pc:
+            pending = post_step(q + 1)
 
         if a_panel.size and b_panel.size:
-            local_c += a_panel @ b_panel
+            local_c += _gemm(a_panel, b_panel)
 
-    gathered = comm.gather(local_c, root=0)
+    gathered = comm.gather(local_c.astype(dtype, copy=False), root=0)
     if comm.rank != 0:
         return None
 
-    result = np.zeros((m, n), dtype=dtype)
-    for rank, block in enumerate(gathered):
-        if block is None:
-            continue
-        rr = rank // pc
-        cc = rank % pc
-        rs, re = row_ranges[rr]
-        cs, ce = col_ranges[cc]
-        if rs == re or cs == ce:
-            continue
-        result[rs:re, cs:ce] = block
-    return result
+    # every rank sends its block even when a range is empty, so the 0-row or
+    # 0-column blocks keep each grid row and column consistent for np.block
+    return np.block([[gathered[order[rr * pc + cc]] for cc in range(pc)] for rr in range(pr)])
 
 
 def _matmul_entry(a: np.ndarray, b: np.ndarray) -> Optional[np.ndarray]:
-    comm = COMM_WORLD or LocalComm()
+    comm = get_comm_world() or LocalComm()
     return _matmul_impl(a, b, comm)
 
 
-def _matmul_distributed_entry() -> Optional[np.ndarray]:
-    comm = COMM_WORLD or LocalComm()
+def _matmul_distributed_entry(meta: Tuple[int, int, int, np.dtype]) -> Optional[np.ndarray]:
+    comm = get_comm_world() or LocalComm()
     if comm.rank == 0:
         if _MATMUL_INPUTS is None:
             raise ValueError("matmul inputs missing on root")
         a, b = _MATMUL_INPUTS
     else:
         a = b = None
-    return _matmul_distributed(comm, a=a, b=b)
-
-
-def mat_mul(a: np.ndarray, b: np.ndarray, comm: Optional[object] = None) -> Optional[np.ndarray]:
+    return _matmul_distributed(comm, a=a, b=b, meta=meta)
+
+
+def mat_mul(
+    a: np.ndarray,
+    b: np.ndarray,
+    comm: Optional[object] = None,
+    *,
+    dtype=None,
+) -> Optional[np.ndarray]:
+    """Multiply ``a @ b``, optionally casting both operands to ``dtype`` first.
+
+    A narrower ``dtype`` (``np.float32``, or ``"bfloat16"`` when ml_dtypes is
+    installed, float32 otherwise) halves the bytes sent per panel and speeds up
+    the local GEMMs, at the cost of precision: float32 keeps ~7 significant
+    digits and bfloat16 ~3, and rounding error grows with the inner dimension.
+    """
+    dtype = _resolve_dtype(dtype)
+    if dtype is not None:
+        a = np.asarray(a, dtype=dtype)
+        b = np.asarray(b, dtype=dtype)
     if comm is None:
-        comm = COMM_WORLD
+        comm = get_comm_world()
     if comm is None:
         cfg = get_config()
         if cfg is not None and os.environ.get("MPI_RANK") is None:
             global _MATMUL_INPUTS
+            a = _as_2d_array(a, "a")
+            b = _as_2d_array(b, "b")
+            if a.shape[1] != b.shape[0]:
+                raise ValueError("incompatible matrix dimensions")
             _MATMUL_INPUTS = (a, b)
             try:
-                return run(_matmul_distributed_entry)
+                return run(_matmul_distributed_entry, _matmul_meta(a, b))
             finally:
                 _MATMUL_INPUTS = None
         comm = LocalComm()
@@ -8,8 +8,10 @@ import random
 from dataclasses import dataclass
 from typing import Any, Callable, Optional
 
+import numpy as np
+
 from .config import get_config
-from .runtime import COMM_WORLD, LocalComm, cancel_requested, run
+from .runtime import LocalComm, cancel_requested, get_comm_world, run
 
 
 @dataclass(frozen=True)
@@ -20,35 +22,52 @@ class MonteCarloResult:
     samples: int
 
 
+# most samples the default reducer holds at once on the scalar path
+_SCALAR_BATCH = 1 << 16
+
+
 def _partition_counts(total: int, parts: int) -> list[int]:
     base = total // parts
     remainder = total % parts
     return [base + (1 if i < remainder else 0) for i in range(parts)]
 
 
-def _default_init() -> dict[str, float]:
-    return {"sum": 0.0, "sumsq": 0.0, "count": 0.0}
+@dataclass
+class _Moments:
+    # slotted attributes: three float stores per sample instead of three dict hash updates
+    __slots__ = ("sum", "sumsq", "count")
+    sum: float
+    sumsq: float
+    count: float
+
+    def __iadd__(self, other: "_Moments") -> "_Moments":
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        self.count += other.count
+        return self
 
 
-def _default_reduce(acc: dict[str, float], value: float) -> dict[str, float]:
-    acc["sum"] += value
-    acc["sumsq"] += value * value
-    acc["count"] += 1.0
+def _default_init() -> _Moments:
+    return _Moments(0.0, 0.0, 0.0)
+
+
+def _default_reduce(acc: _Moments, value: float) -> _Moments:
+    acc.sum += value
+    acc.sumsq += value * value
+    acc.count += 1.0
     return acc
 
 
-def _default_combine(left: dict[str, float], right: dict[str, float]) -> dict[str, float]:
-    left["sum"] += right["sum"]
-    left["sumsq"] += right["sumsq"]
-    left["count"] += right["count"]
+def _default_combine(left: _Moments, right: _Moments) -> _Moments:
+    left += right
     return left
 
 
-def _default_finalize(acc: dict[str, float], total_samples: int) -> MonteCarloResult:
+def _default_finalize(acc: _Moments, total_samples: int) -> MonteCarloResult:
     if total_samples <= 0:
         return MonteCarloResult(mean=float("nan"), variance=float("nan"), stderr=float("nan"), samples=0)
-    mean = acc["sum"] / total_samples
-    variance = max(0.0, acc["sumsq"] / total_samples - mean * mean)
+    mean = acc.sum / total_samples
+    variance = max(0.0, acc.sumsq / total_samples - mean * mean)
     stderr = math.sqrt(variance / total_samples)
     return MonteCarloResult(mean=mean, variance=variance, stderr=stderr, samples=total_samples)
 
@@ -67,7 +86,8 @@ def _monte_carlo_impl(
 ):
     if num_samples < 0:
         raise ValueError("num_samples must be non-negative")
-    if reduce_fn is None:
+    default_reducer = reduce_fn is None
+    if default_reducer:
         init_fn = _default_init
         reduce_fn = _default_reduce
         combine_fn = _default_combine
@@ -84,13 +104,29 @@ def _monte_carlo_impl(
 
     acc = init_fn()
     cancelled = False
-    for i in range(local_samples):
-        if cancel_check_every and i % cancel_check_every == 0 and cancel_requested():
-            cancelled = True
-            break
-        sample = sample_fn(rng)
-        value = eval_fn(sample)
-        acc = reduce_fn(acc, value)
+    if default_reducer:
+        # the samples still come one at a time from the Random, but each run
+        # between cancel checks is summed by numpy instead of per-sample reduces;
+        # runs are capped so memory stays bounded when cancel checks are off
+        step = min(cancel_check_every or _SCALAR_BATCH, _SCALAR_BATCH)
+        next_check = 0
+        for base in range(0, local_samples, step):
+            if cancel_check_every and base >= next_check:
+                next_check += cancel_check_every
+                if cancel_requested():
+                    cancelled = True
+                    break
+            size = min(step, local_samples - base)
+            values = np.fromiter((eval_fn(sample_fn(rng)) for _ in range(size)), dtype=np.float64, count=size)
+            acc += _Moments(float(values.sum()), float(np.dot(values, values)), float(size))
+    else:
+        for i in range(local_samples):
+            if cancel_check_every and i % cancel_check_every == 0 and cancel_requested():
+                cancelled = True
+                break
+            sample = sample_fn(rng)
+            value = eval_fn(sample)
+            acc = reduce_fn(acc, value)
 
     partials = comm.gather((cancelled, acc), root=0)
     if comm.rank != 0:
@@ -108,6 +144,67 @@ def _monte_carlo_impl(
     return finalize_fn(combined, num_samples)
 
 
+def _rank_generator(seed: Optional[int], rank: int) -> np.random.Generator:
+    # PCG64 jumped `rank` times gives each rank its own non-overlapping stream
+    # from one seed, unlike seeding rank r with seed + r
+    return np.random.Generator(np.random.PCG64(seed).jumped(rank))
+
+
+def _default_batch_sampler(dims: int) -> Callable[[np.random.Generator, int], np.ndarray]:
+    def sample(rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.random((size, dims))
+
+    return sample
+
+
+def _monte_carlo_vec_impl(
+    num_samples: int,
+    sampler: Optional[Callable[[np.random.Generator, int], Any]],
+    evaluator: Callable[[Any], np.ndarray],
+    dims: int,
+    batch_size: int,
+    seed: Optional[int],
+    comm,
+):
+    if num_samples < 0:
+        raise ValueError("num_samples must be non-negative")
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    if sampler is None:
+        sampler = _default_batch_sampler(dims)
+
+    counts = _partition_counts(num_samples, comm.size)
+    local_samples = counts[comm.rank]
+    rng = _rank_generator(seed, comm.rank)
+
+    total = 0.0
+    total_sq = 0.0
+    cancelled = False
+    for base in range(0, local_samples, batch_size):
+        if cancel_requested():
+            cancelled = True
+            break
+        size = min(batch_size, local_samples - base)
+        values = np.asarray(evaluator(sampler(rng, size)), dtype=np.float64).reshape(-1)
+        if values.shape[0] != size:
+            raise ValueError("evaluator must return one value per sample in the batch")
+        total += float(values.sum())
+        total_sq += float(np.dot(values, values))
+
+    partials = comm.gather((cancelled, total, total_sq), root=0)
+    if comm.rank != 0:
+        return None
+
+    if any(flag for flag, _, _ in partials):
+        return None
+
+    acc = _default_init()
+    for _, part_sum, part_sumsq in partials:
+        acc += _Moments(part_sum, part_sumsq, 0.0)
+    acc.count = float(num_samples)
+    return _default_finalize(acc, num_samples)
+
+
 def _monte_carlo_entry(
     num_samples: int,
     sample_fn: Callable[[random.Random], Any],
@@ -119,7 +216,7 @@ def _monte_carlo_entry(
     seed: Optional[int],
     cancel_check_every: int,
 ):
-    comm = COMM_WORLD or LocalComm()
+    comm = get_comm_world() or LocalComm()
     return _monte_carlo_impl(
         num_samples,
         sample_fn,
@@ -136,7 +233,7 @@ def _monte_carlo_entry(
 
 def monte_carlo(
     num_samples: int,
-    sample_fn: Callable[[random.Random], Any],
+    sample_fn: Optional[Callable[[random.Random], Any]],
     eval_fn: Callable[[Any], float],
     *,
     init_fn: Optional[Callable[[], Any]] = None,
@@ -145,6 +242,7 @@ def monte_carlo(
     finalize_fn: Optional[Callable[[Any, int], Any]] = None,
     seed: Optional[int] = None,
     cancel_check_every: int = 1024,
+    dims: int = 1,
     comm: Optional[object] = None,
 ):
     """Run a Monte Carlo estimate across ranks.
@@ -152,12 +250,22 @@ def monte_carlo(
     sample_fn must accept a random.Random instance and return a sample.
     eval_fn should map a sample to a numeric value (for the default reducer).
 
+    If sample_fn is None, samples are uniform [0, 1) points drawn in batches
+    of shape (size, dims) from a numpy Generator and eval_fn must map a whole
+    batch to an array of values (see monte_carlo_vec). Only the default
+    reducer is supported on that path.
+
     If reduce_fn is provided, init_fn and combine_fn are required. finalize_fn
     is optional; if omitted, the combined accumulator is returned on rank 0.
     """
 
+    if sample_fn is None:
+        if reduce_fn is not None:
+            raise ValueError("sample_fn=None only supports the default reducer")
+        return monte_carlo_vec(num_samples, None, eval_fn, dims=dims, seed=seed, comm=comm)
+
     if comm is None:
-        comm = COMM_WORLD
+        comm = get_comm_world()
     if comm is None:
         cfg = get_config()
         if cfg is not None and os.environ.get("MPI_RANK") is None:
@@ -186,3 +294,49 @@ def monte_carlo(
         cancel_check_every,
         comm,
     )
+
+
+def _monte_carlo_vec_entry(
+    num_samples: int,
+    sampler: Optional[Callable[[np.random.Generator, int], Any]],
+    evaluator: Callable[[Any], np.ndarray],
+    dims: int,
+    batch_size: int,
+    seed: Optional[int],
+):
+    comm = get_comm_world() or LocalComm()
+    return _monte_carlo_vec_impl(num_samples, sampler, evaluator, dims, batch_size, seed, comm)
+
+
+def monte_carlo_vec(
+    num_samples: int,
+    sampler: Optional[Callable[[np.random.Generator, int], Any]],
+    evaluator: Callable[[Any], np.ndarray],
+    *,
+    dims: int = 1,
+    batch_size: int = 1 << 16,
+    seed: Optional[int] = None,
+    comm: Optional[object] = None,
+) -> Optional[MonteCarloResult]:
+    """Run a batched Monte Carlo estimate across ranks with the default reducer.
+
+    sampler(rng, size) must return a batch of `size` samples from a
+    numpy.random.Generator; pass None to draw uniform [0, 1) points of shape
+    (size, dims). evaluator maps a batch to an array of `size` values, e.g.::
+
+        def inside_unit_circle(x):
+            return (x[:, 0] ** 2 + x[:, 1] ** 2 <= 1.0).astype(np.float64)
+
+    On a cluster, sampler and evaluator are pickled for the workers, so they
+    must be module-level functions the workers can import (not lambdas or
+    nested functions).
+    """
+
+    if comm is None:
+        comm = get_comm_world()
+    if comm is None:
+        cfg = get_config()
+        if cfg is not None and os.environ.get("MPI_RANK") is None:
+            return run(_monte_carlo_vec_entry, num_samples, sampler, evaluator, dims, batch_size, seed)
+        comm = LocalComm()
+    return _monte_carlo_vec_impl(num_samples, sampler, evaluator, dims, batch_size, seed, comm)
@@ -0,0 +1,198 @@
+"""Optional mpi4py backend, used instead of the TCP runtime when mpiexec starts the job."""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .protocol import _is_raw_ndarray
+from .runtime import TAG_BCAST, TAG_USER, Request
+
+# importing mpi4py.MPI runs MPI_Init, so it is only loaded once the
+# environment says an MPI launcher started this process
+MPI = None
+
+# set by mpiexec/mpirun in every rank it starts (OpenMPI, MPICH/Hydra, PMIx, Intel MPI)
+_MPIEXEC_ENV = ("OMPI_COMM_WORLD_SIZE", "PMI_SIZE", "PMIX_RANK", "MPI_LOCALNRANKS")
+
+
+def _load_mpi():
+    global MPI
+    if MPI is None:
+        from mpi4py import MPI as mpi
+
+        MPI = mpi
+    return MPI
+
+
+def available() -> bool:
+    """True when this process was started by an MPI launcher and mpi4py is importable."""
+    if not any(name in os.environ for name in _MPIEXEC_ENV):
+        return False
+    try:
+        _load_mpi()
+    except ImportError:  # pragma: no cover - optional dependency
+        return False
+    return True
+
+
+class MPIComm:
+    """Comm-compatible wrapper over an mpi4py communicator.
+
+    Point-to-point calls use mpi4py's pickle-based methods. Collectives on raw
+    ndarrays send a small pickled descriptor and then move the array bytes
+    with the buffer-based Bcast/Scatterv/Gatherv, so large panels are not
+    pickled and the MPI library's tuned collectives carry them.
+    """
+
+    # MPI picks its own process placement, so collectives and the matmul grid
+    # get no node hints from mpipy
+    ranks_per_node = None
+
+    def __init__(self, comm=None):
+        try:
+            _load_mpi()
+        except ImportError:
+            raise RuntimeError("mpi4py is not installed") from None
+        self._comm = comm if comm is not None else MPI.COMM_WORLD
+        self.rank = self._comm.Get_rank()
+        self.size = self._comm.Get_size()
+        self._groups: Dict[Tuple[int, ...], object] = {}
+
+    def node_of(self, rank: int) -> int:
+        return rank
+
+    def send(self, obj, dest: int, tag: int = TAG_USER):
+        self._comm.send(obj, dest=dest, tag=tag)
+
+    def recv(self, source: Optional[int] = None, tag: Optional[int] = None, timeout: Optional[float] = None):
+        source = MPI.ANY_SOURCE if source is None else source
+        tag = MPI.ANY_TAG if tag is None else tag
+        if timeout is not None:
+            deadline = time.time() + timeout
+            while not self._comm.Iprobe(source=source, tag=tag):
+                if time.time() > deadline:
+                    raise TimeoutError("recv timed out")
+                time.sleep(0.001)
+        return self._comm.recv(source=source, tag=tag)
+
+    def isend(self, obj, dest: int, tag: int = TAG_USER):
+        mpi_req = self._comm.isend(obj, dest=dest, tag=tag)
+
+        def wait(timeout):
+            if timeout is None:
+                return mpi_req.wait()
+            deadline = time.time() + timeout
+            while True:
+                done, result = mpi_req.test()
+                if done:
+                    return result
+                if time.time() > deadline:
+                    raise TimeoutError("isend timed out")
+                time.sleep(0.001)
+
+        return Request(wait)
+
+    def irecv(self, source: Optional[int] = None, tag: Optional[int] = None):
+        return Request(lambda timeout: self.recv(source=source, tag=tag, timeout=timeout))
+
+    def _group_comm(self, ranks: Optional[Sequence[int]]):
+        if ranks is None:
+            return self._comm
+        key = tuple(ranks)
+        sub = self._groups.get(key)
+        if sub is None:
+            # Create_group is collective over the members only, so a grid row
+            # can build its communicator without the rest of the world
+            group = self._comm.Get_group().Incl(list(key))
+            sub = self._comm.Create_group(group, tag=0)
+            group.Free()
+            self._groups[key] = sub
+        return sub
+
+    def bcast(self, value, root: int = 0, ranks: Optional[Sequence[int]] = None, tag: int = TAG_BCAST):
+        comm = self._group_comm(ranks)
+        if ranks is not None:
+            root = list(ranks).index(root)
+        is_root = comm.Get_rank() == root
+        if is_root and _is_raw_ndarray(value):
+            value = np.ascontiguousarray(value)
+            desc = ("ndarray", value.shape, value.dtype)
+        else:
+            desc = ("object", value if is_root else None)
+        desc = comm.bcast(desc, root=root)
+        if desc[0] == "object":
+            return desc[1]
+        buf = value if is_root else np.empty(desc[1], dtype=desc[2])
+        comm.Bcast([buf, MPI.BYTE], root=root)
+        return buf
+
+    def ibcast(self, value, root: int = 0, ranks: Optional[Sequence[int]] = None, tag: int = TAG_BCAST):
+        # receivers only learn the payload shape from the bcast itself, so the
+        # collective runs when the request is waited on; a blocking MPI
+        # collective cannot honour a timeout
+        return Request(lambda _timeout: self.bcast(value, root=root, ranks=ranks, tag=tag))
+
+    def scatter(self, values, root: int = 0):
+        desc = None
+        if self.rank == root:
+            if len(values) != self.size:
+                raise ValueError("scatter values must match size")
+            desc = _stack_desc(values)
+        desc = self._comm.bcast(desc, root=root)
+        if desc is None:
+            return self._comm.scatter(values, root=root)
+        shapes, dtype = desc
+        counts = [int(np.prod(shape)) * dtype.itemsize for shape in shapes]
+        send = None
+        if self.rank == root:
+            flat = np.concatenate([np.ascontiguousarray(v).reshape(-1).view(np.uint8) for v in values])
+            send = [flat, counts, _displacements(counts), MPI.BYTE]
+        out = np.empty(shapes[self.rank], dtype=dtype)
+        self._comm.Scatterv(send, [out, MPI.BYTE], root=root)
+        return out
+
+    def gather(self, value, root: int = 0):
+        # every rank needs to agree on the path, so descriptors go to all ranks
+        descs = self._comm.allgather((value.shape, value.dtype) if _is_raw_ndarray(value) else None)
+        if any(d is None for d in descs) or len({d[1] for d in descs}) != 1:
+            return self._comm.gather(value, root=root)
+        dtype = descs[0][1]
+        counts = [int(np.prod(shape)) * dtype.itemsize for shape, _dtype in descs]
+        recv = None
+        if self.rank == root:
+            flat = np.empty(sum(counts), dtype=np.uint8)
+            recv = [flat, counts, _displacements(counts), MPI.BYTE]
+        self._comm.Gatherv([np.ascontiguousarray(value), MPI.BYTE], recv, root=root)
+        if self.rank != root:
+            return None
+        offsets = _displacements(counts)
+        return [
+            flat[off:off + count].view(dtype).reshape(shape)
+            for off, count, (shape, _dtype) in zip(offsets, counts, descs)
+        ]
+
+    def barrier(self):
+        self._comm.Barrier()
+
+
+def _stack_desc(values) -> Optional[Tuple[list, np.dtype]]:
+    # (shapes, dtype) when every value can travel in one Scatterv buffer
+    if not values or not all(_is_raw_ndarray(v) for v in values):
+        return None
+    dtype = values[0].dtype
+    if any(v.dtype != dtype for v in values):
+        return None
+    return [v.shape for v in values], dtype
+
+
+def _displacements(counts: Sequence[int]) -> list[int]:
+    offsets = []
+    total = 0
+    for count in counts:
+        offsets.append(total)
+        total += count
+    return offsets
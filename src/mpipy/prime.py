@@ -1,42 +1,61 @@
-"""Parallel primality test by checking divisibility up to sqrt(n)."""
+"""Parallel primality test using Miller-Rabin with witnesses split across ranks."""
 
 from __future__ import annotations
 
-import math
 import os
 from typing import Optional
 
 from .config import get_config
-from .runtime import COMM_WORLD, LocalComm, cancel_requested, run
+from .runtime import LocalComm, cancel_requested, get_comm_world, run
+
+
+# the first 13 primes are a deterministic witness set for n below this bound
+_DETERMINISTIC_LIMIT = 3_317_044_064_679_887_385_961_981
+_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+# past the bound the test is probabilistic (error below 4**-len(bases))
+_EXTRA_WITNESSES = (
+    43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97, 101, 103, 107, 109, 113,
+    127, 131, 137, 139, 149, 151, 157, 163, 167, 173, 179, 181, 191, 193, 197,
+    199, 211, 223, 227, 229, 233, 239, 241, 251, 257, 263, 269, 271, 277, 281,
+    283, 293, 307, 311,
+)
+
+
+def _is_witness(a: int, d: int, s: int, n: int) -> bool:
+    # True when base a proves n composite, given n - 1 = d * 2**s with d odd
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return False
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return False
+    return True
 
 
 def _is_prime_impl(n: int, comm) -> bool:
     if n < 2:
         return False
-    if n % 2 == 0:
-        return n == 2
+    for p in _WITNESSES:
+        if n % p == 0:
+            return n == p
 
-    limit = int(math.isqrt(n))
-    if limit < 2:
-        return True
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
 
-    root = 0
-    size = comm.size
-    span = max(0, limit - 1)
-    chunk = (span + size - 1) // size
-    start = 2 + comm.rank * chunk
-    end = min(limit, start + chunk - 1)
+    bases = _WITNESSES if n < _DETERMINISTIC_LIMIT else _WITNESSES + _EXTRA_WITNESSES
 
+    root = 0
     local_is_composite = False
-    if start <= end:
-        if start % 2 == 0:
-            start += 1
-        for i, d in enumerate(range(start, end + 1, 2), start=start):
-            if i % 1024 == 0 and cancel_requested():
-                return False
-            if n % d == 0:
-                local_is_composite = True
-                break
+    for a in bases[comm.rank::comm.size]:
+        if cancel_requested():
+            return False
+        if _is_witness(a, d, s, n):
+            local_is_composite = True
+            break
 
     results = comm.gather(local_is_composite, root=root)
     if comm.rank == root:
@@ -45,13 +64,13 @@ def _is_prime_impl(n: int, comm) -> bool:
 
 
 def _is_prime_entry(n: int) -> bool:
-    comm = COMM_WORLD or LocalComm()
+    comm = get_comm_world() or LocalComm()
     return _is_prime_impl(n, comm)
 
 
 def is_prime(n: int, comm: Optional[object] = None) -> bool:
     if comm is None:
-        comm = COMM_WORLD
+        comm = get_comm_world()
     if comm is None:
         cfg = get_config()
         if cfg is not None and os.environ.get("MPI_RANK") is None:
@@ -5,15 +5,50 @@ import pickle
 import struct
 from typing import Tuple
 
+import numpy as np
+
+try:
+    import lz4.frame as _lz4
+except ImportError:  # pragma: no cover - optional dependency
+    _lz4 = None
+
 
 class MsgType(enum.IntEnum):
     DATA = 1
     CONTROL = 2
+    NDARRAY = 3
+    BYTES = 4
+    BYTEARRAY = 5  # also carries memoryviews, which arrive as bytearray
+    PICKLE_OOB = 6  # pickle stream plus out-of-band buffers
+
+
+# set in a frame's type byte when its payload is the LZ4-compressed encoding
+FLAG_LZ4 = 0x80
+
+_PAYLOAD_TYPES = (MsgType.DATA, MsgType.NDARRAY, MsgType.BYTES, MsgType.BYTEARRAY, MsgType.PICKLE_OOB)
+# frame types that carry a user payload (everything but CONTROL), plain or compressed
+DATA_TYPES = frozenset(_PAYLOAD_TYPES) | frozenset(t | FLAG_LZ4 for t in _PAYLOAD_TYPES)
 
 
 HEADER_STRUCT = struct.Struct("!I B I I I")
 # length (uint32), type (uint8), src (uint32), dest (uint32), tag (uint32)
 
+NDARRAY_STRUCT = struct.Struct("!c B B")
+# order (b"C"/b"F"), ndim (uint8), dtype str length (uint8); followed by the
+# dtype str, ndim uint64 dims, and the raw array bytes
+
+OOB_STRUCT = struct.Struct("!I Q")
+# buffer count (uint32), pickle stream length (uint64); followed by the uint64
+# buffer lengths, the pickle stream, then each buffer at an 8-byte aligned offset
+
+# smaller buffers are cheaper to copy into the pickle stream than to send apart
+_OOB_MIN_BYTES = 1 << 16
+
+# below this the LZ4 pass costs more than the bytes it could save; a payload
+# that does not shrink by a tenth is sent as it is
+_COMPRESS_MIN_BYTES = 16 << 10
+_COMPRESS_MIN_SAVING = 0.1
+
 
 def pack_message(msg_type: MsgType, src: int, dest: int, tag: int, payload: bytes) -> bytes:
     header = HEADER_STRUCT.pack(len(payload), int(msg_type), src, dest, tag)
@@ -29,5 +64,186 @@ def dumps(obj) -> bytes:
     return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
 
 
-def loads(payload: bytes):
-    return pickle.loads(payload)
+def loads(payload: bytes, buffers=None):
+    return pickle.loads(payload, buffers=buffers)
+
+
+def dumps_oob(obj) -> Tuple[bytes, list]:
+    """Pickle with protocol 5, keeping large array buffers out of the stream."""
+    buffers: list = []
+
+    def keep_in_band(buf: pickle.PickleBuffer) -> bool:
+        if buf.raw().nbytes < _OOB_MIN_BYTES:
+            return True
+        buffers.append(buf)
+        return False
+
+    return pickle.dumps(obj, protocol=5, buffer_callback=keep_in_band), buffers
+
+
+def _pad(offset: int) -> int:
+    return -offset % 8
+
+
+def _oob_parts(stream: bytes, buffers: list) -> Tuple:
+    raws = [buf.raw() for buf in buffers]
+    table = OOB_STRUCT.pack(len(raws), len(stream)) + struct.pack(f"!{len(raws)}Q", *(raw.nbytes for raw in raws))
+    parts = [table, stream]
+    offset = len(table) + len(stream)
+    for raw in raws:
+        pad = _pad(offset)
+        if pad:
+            parts.append(bytes(pad))
+        parts.append(raw)
+        offset += pad + raw.nbytes
+    return tuple(parts)
+
+
+def _loads_oob(payload):
+    # buffers are views into the received payload, so arrays in the result
+    # share its memory instead of being copied out of a pickle stream
+    view = memoryview(payload)
+    count, stream_len = OOB_STRUCT.unpack_from(view, 0)
+    offset = OOB_STRUCT.size
+    lengths = struct.unpack_from(f"!{count}Q", view, offset)
+    offset += 8 * count
+    stream = view[offset:offset + stream_len]
+    offset += stream_len
+    buffers = []
+    for length in lengths:
+        offset += _pad(offset)
+        buffers.append(view[offset:offset + length])
+        offset += length
+    return loads(stream, buffers=buffers)
+
+
+def _is_raw_ndarray(obj) -> bool:
+    # subclasses, object arrays, structured dtypes and extension dtypes whose
+    # str does not round-trip (e.g. ml_dtypes.bfloat16) keep going through pickle
+    if type(obj) is not np.ndarray:
+        return False
+    dtype = obj.dtype
+    return not dtype.hasobject and dtype.names is None and np.dtype(dtype.str) == dtype
+
+
+def _ndarray_descriptor(arr: np.ndarray) -> Tuple[bytes, np.ndarray]:
+    if arr.flags.c_contiguous:
+        order = b"C"
+    elif arr.flags.f_contiguous:
+        order = b"F"
+    else:
+        arr = np.ascontiguousarray(arr)
+        order = b"C"
+    dtype_str = arr.dtype.str.encode("ascii")
+    header = NDARRAY_STRUCT.pack(order, arr.ndim, len(dtype_str))
+    shape = struct.pack(f"!{arr.ndim}Q", *arr.shape)
+    return header + dtype_str + shape, arr
+
+
+def byte_view(arr: np.ndarray) -> memoryview:
+    """Flat uint8 view over a C- or F-contiguous array, for sending or recv_into."""
+    return memoryview(arr.reshape(-1, order="A").view(np.uint8))
+
+
+def ndarray_descriptor_size(fixed) -> int:
+    """Full descriptor length, given its first NDARRAY_STRUCT.size bytes."""
+    _order, ndim, dtype_len = NDARRAY_STRUCT.unpack_from(fixed, 0)
+    return NDARRAY_STRUCT.size + dtype_len + 8 * ndim
+
+
+def _parse_descriptor(descriptor) -> Tuple[str, np.dtype, Tuple[int, ...]]:
+    order, ndim, dtype_len = NDARRAY_STRUCT.unpack_from(descriptor, 0)
+    offset = NDARRAY_STRUCT.size
+    dtype = np.dtype(bytes(descriptor[offset:offset + dtype_len]).decode("ascii"))
+    shape = struct.unpack_from(f"!{ndim}Q", descriptor, offset + dtype_len)
+    return order.decode("ascii"), dtype, shape
+
+
+def empty_ndarray(descriptor) -> np.ndarray:
+    """Allocate the uninitialized array a descriptor announces."""
+    order, dtype, shape = _parse_descriptor(descriptor)
+    return np.empty(shape, dtype=dtype, order=order)
+
+
+def loads_ndarray(payload) -> np.ndarray:
+    # copied into a fresh array, as the reactor's in-place path receives them:
+    # the data sits at an arbitrary offset in the frame, so a view of it could
+    # be unaligned and would keep the whole frame buffer alive
+    offset = ndarray_descriptor_size(payload)
+    arr = empty_ndarray(payload)
+    view = byte_view(arr)
+    if len(payload) - offset != view.nbytes:
+        raise ValueError("ndarray payload does not match its descriptor")
+    view[:] = memoryview(payload)[offset:]
+    return arr
+
+
+def encode_parts(obj) -> Tuple[MsgType, Tuple]:
+    """Serialize a DATA payload as buffers to send back to back.
+
+    Arrays and bytes-like objects skip pickle and are sent from their own
+    memory, so the caller must not modify them until the send returns.
+    """
+    if _is_raw_ndarray(obj):
+        descriptor, arr = _ndarray_descriptor(obj)
+        return MsgType.NDARRAY, (descriptor, byte_view(arr))
+    if type(obj) is bytes:
+        return MsgType.BYTES, (obj,)
+    if isinstance(obj, (bytearray, memoryview)):
+        view = memoryview(obj)
+        view = view.cast("B") if view.nbytes and view.c_contiguous else memoryview(view.tobytes())
+        return MsgType.BYTEARRAY, (view,)
+    stream, buffers = dumps_oob(obj)
+    if buffers:
+        return MsgType.PICKLE_OOB, _oob_parts(stream, buffers)
+    return MsgType.DATA, (stream,)
+
+
+def encode_payload(obj) -> Tuple[MsgType, bytes]:
+    """Serialize a DATA payload, using the raw ndarray codec when possible."""
+    msg_type, parts = encode_parts(obj)
+    return msg_type, b"".join(parts)
+
+
+def lz4_available() -> bool:
+    return _lz4 is not None
+
+
+def compress_parts(msg_type: MsgType, parts) -> Tuple[int, Tuple]:
+    """LZ4-compress encoded payload parts, flagging the type byte, when it pays off.
+
+    Without lz4 installed, or when the payload is small or does not compress,
+    the parts are returned unchanged.
+    """
+    if _lz4 is None:
+        return msg_type, parts
+    size = sum(len(p) for p in parts)
+    if size < _COMPRESS_MIN_BYTES:
+        return msg_type, parts
+    # the parts are compressed one after another into a single LZ4 frame, so
+    # they are never joined into one buffer first
+    compressor = _lz4.LZ4FrameCompressor()
+    packed = [compressor.begin(size)]
+    packed.extend(compressor.compress(p) for p in parts)
+    packed.append(compressor.flush())
+    if sum(len(p) for p in packed) > size * (1 - _COMPRESS_MIN_SAVING):
+        return msg_type, parts
+    return msg_type | FLAG_LZ4, tuple(packed)
+
+
+def decode_payload(msg_type: MsgType, payload):
+    if msg_type & FLAG_LZ4:
+        if _lz4 is None:
+            raise RuntimeError("received an LZ4-compressed frame but lz4 is not installed")
+        # a bytearray keeps decoded arrays writable, as uncompressed ones are
+        payload = _lz4.decompress(payload, return_bytearray=True)
+        msg_type = MsgType(msg_type & ~FLAG_LZ4)
+    if msg_type == MsgType.NDARRAY:
+        return loads_ndarray(payload)
+    if msg_type == MsgType.BYTES:
+        return bytes(payload)
+    if msg_type == MsgType.BYTEARRAY:
+        return payload if isinstance(payload, bytearray) else bytearray(payload)
+    if msg_type == MsgType.PICKLE_OOB:
+        return _loads_oob(payload)
+    return loads(payload)
@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+import functools
 import os
+import queue
 import threading
 import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
 
 from .config import ConfigError, InfraConfig, clear_config, get_config
 from .launcher import launch_workers
-from .transport import CANCEL_TAG, MasterRouter, WorkerTransport, connect_to_master
+from .transport import CANCEL_TAG, MasterRouter, WorkerTransport, connect_to_master, encode_args
 
 
 TAG_USER = 0
@@ -33,58 +35,235 @@ class JobCancelled(RuntimeError):
     pass
 
 
+class Request:
+    """Handle for a non-blocking operation; wait() blocks until it completes and returns its result.
+
+    A deferred operation runs as wait_fn(timeout) when it is waited on. If it
+    times out the request stays pending, so a later wait() can try again.
+    """
+
+    def __init__(self, wait_fn: Optional[Callable[[Optional[float]], Any]] = None):
+        self._wait_fn = wait_fn
+        self._done = threading.Event()
+        self._result = None
+        self._error: Optional[BaseException] = None
+
+    def _complete(self, result=None, error: Optional[BaseException] = None):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None):
+        if self._wait_fn is not None:
+            try:
+                result = self._wait_fn(timeout)
+            except TimeoutError:
+                raise
+            except BaseException as exc:
+                self._wait_fn = None
+                self._complete(error=exc)
+            else:
+                self._wait_fn = None
+                self._complete(result)
+        if not self._done.wait(timeout):
+            raise TimeoutError("request timed out")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
 class Comm:
-    def __init__(self, rank: int, size: int, transport):
+    def __init__(self, rank: int, size: int, transport, ranks_per_node: Optional[int] = None):
         self.rank = rank
         self.size = size
+        self.ranks_per_node = ranks_per_node
         self._transport = transport
+        self._send_queue: Optional[queue.Queue] = None
+        self._outstanding = 0
+        self._outstanding_lock = threading.Lock()
 
     def send(self, obj, dest: int, tag: int = TAG_USER):
+        if self._outstanding:
+            # queue behind earlier isends so messages to a rank never overtake each other
+            self.isend(obj, dest=dest, tag=tag).wait()
+            return
         self._transport.send(dest=dest, tag=tag, obj=obj)
 
     def recv(self, source: Optional[int] = None, tag: Optional[int] = None, timeout: Optional[float] = None):
-        msg = self._transport.recv(tag=tag, timeout=timeout)
-        if source is not None and msg.src != source:
-            return self.recv(source=source, tag=tag, timeout=timeout)
+        msg = self._transport.recv(tag=tag, timeout=timeout, source=source)
         return msg.payload
 
-    def bcast(self, value, root: int = 0):
-        if self.rank == root:
-            for r in range(self.size):
-                if r != root:
-                    self.send(value, dest=r, tag=TAG_BCAST)
-            return value
-        return self.recv(source=root, tag=TAG_BCAST)
+    def isend(self, obj, dest: int, tag: int = TAG_USER) -> Request:
+        """Hand obj to this comm's sender thread; `obj` must not be modified until the request completes."""
+        req = Request()
+        with self._outstanding_lock:
+            self._outstanding += 1
+            if self._send_queue is None:
+                self._send_queue = queue.Queue()
+                threading.Thread(target=self._send_loop, daemon=True).start()
+        self._send_queue.put((obj, dest, tag, req))
+        return req
+
+    def irecv(self, source: Optional[int] = None, tag: Optional[int] = None) -> Request:
+        # the transport's receive thread already buffers arriving messages in the
+        # background, so the request only claims its message when waited on
+        return Request(lambda timeout: self.recv(source=source, tag=tag, timeout=timeout))
+
+    def _send_loop(self):
+        while True:
+            obj, dest, tag, req = self._send_queue.get()
+            try:
+                self._transport.send(dest=dest, tag=tag, obj=obj)
+                req._complete()
+            except BaseException as exc:
+                req._complete(error=exc)
+            with self._outstanding_lock:
+                self._outstanding -= 1
+
+    # Collectives run over a two-level tree (see _collective_tree): a binomial
+    # tree across node leaders, then a binomial tree inside each node, so each
+    # one needs O(log P) rounds and only one copy of a payload crosses to a node.
+
+    def node_of(self, rank: int) -> int:
+        return node_of(rank, self.ranks_per_node)
+
+    def _tree(self, root: int, ranks: Optional[Sequence[int]]) -> Dict[int, Tuple[Optional[int], Tuple[int, ...]]]:
+        members = tuple(range(self.size)) if ranks is None else tuple(ranks)
+        return _collective_tree(root, members, self.ranks_per_node)
+
+    def bcast(self, value, root: int = 0, ranks: Optional[Sequence[int]] = None, tag: int = TAG_BCAST):
+        """Broadcast from root; `ranks` restricts the tree to a subset of ranks (e.g. one grid row)."""
+        parent, children = self._tree(root, ranks)[self.rank]
+        if parent is not None:
+            value = self.recv(source=parent, tag=tag)
+        for child in children:
+            self.send(value, dest=child, tag=tag)
+        return value
+
+    def ibcast(self, value, root: int = 0, ranks: Optional[Sequence[int]] = None, tag: int = TAG_BCAST) -> Request:
+        """Non-blocking bcast; non-root ranks receive and forward to their subtree on wait()."""
+        parent, children = self._tree(root, ranks)[self.rank]
+        if parent is None:
+            sends = [self.isend(value, dest=child, tag=tag) for child in children]
+
+            def finish(timeout):
+                deadline = None if timeout is None else time.monotonic() + timeout
+                for req in sends:
+                    req.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+                return value
+
+            return Request(finish)
+
+        def receive_and_forward(timeout):
+            received = self.recv(source=parent, tag=tag, timeout=timeout)
+            for child in children:
+                self.isend(received, dest=child, tag=tag)
+            return received
+
+        return Request(receive_and_forward)
 
     def scatter(self, values, root: int = 0):
-        if self.rank == root:
+        tree = self._tree(root, None)
+        parent, children = tree[self.rank]
+        if parent is None:
             if len(values) != self.size:
                 raise ValueError("scatter values must match size")
-            for r in range(self.size):
-                if r != root:
-                    self.send(values[r], dest=r, tag=TAG_SCATTER)
-            return values[root]
-        return self.recv(source=root, tag=TAG_SCATTER)
+            held = dict(enumerate(values))
+        else:
+            held = self.recv(source=parent, tag=TAG_SCATTER)
+        for child in children:
+            subtree = {r: held.pop(r) for r in _subtree(tree, child)}
+            self.send(subtree, dest=child, tag=TAG_SCATTER)
+        return held[self.rank]
 
     def gather(self, value, root: int = 0):
-        if self.rank == root:
-            results = [None] * self.size
-            results[root] = value
-            for r in range(1, self.size):
-                results[r] = self.recv(source=r, tag=TAG_GATHER)
-            return results
-        self.send(value, dest=root, tag=TAG_GATHER)
-        return None
+        parent, children = self._tree(root, None)[self.rank]
+        collected = {self.rank: value}
+        for child in children:
+            collected.update(self.recv(source=child, tag=TAG_GATHER))
+        if parent is not None:
+            self.send(collected, dest=parent, tag=TAG_GATHER)
+            return None
+        return [collected[r] for r in range(self.size)]
 
     def barrier(self):
-        if self.rank == 0:
-            for r in range(1, self.size):
-                self.recv(source=r, tag=TAG_BARRIER)
-            for r in range(1, self.size):
-                self.send(True, dest=r, tag=TAG_BARRIER)
-            return
-        self.send(True, dest=0, tag=TAG_BARRIER)
-        self.recv(source=0, tag=TAG_BARRIER)
+        # fan in to rank 0 and back out along the same tree
+        parent, children = self._tree(0, None)[self.rank]
+        for child in children:
+            self.recv(source=child, tag=TAG_BARRIER)
+        if parent is not None:
+            self.send(True, dest=parent, tag=TAG_BARRIER)
+            self.recv(source=parent, tag=TAG_BARRIER)
+        for child in children:
+            self.send(True, dest=child, tag=TAG_BARRIER)
+
+
+def node_of(rank: int, ranks_per_node: Optional[int]) -> int:
+    """Node index of a rank: rank 0 is alone on the master, workers fill nodes in launch order."""
+    if ranks_per_node is None:
+        return rank
+    if rank == 0:
+        return 0
+    return 1 + (rank - 1) // ranks_per_node
+
+
+def _binomial_links(root: int, members: Sequence[int]):
+    # (member, parent, children) of a binomial tree over members rooted at root
+    size = len(members)
+    offset = members.index(root)
+    for i, member in enumerate(members):
+        vr = (i - offset) % size
+        parent = None
+        mask = 1
+        while mask < size:
+            if vr & mask:
+                parent = members[(vr - mask + offset) % size]
+                break
+            mask <<= 1
+        children = []
+        mask >>= 1
+        while mask > 0:
+            if vr + mask < size:
+                children.append(members[(vr + mask + offset) % size])
+            mask >>= 1
+        yield member, parent, children
+
+
+@functools.lru_cache(maxsize=256)
+def _collective_tree(
+    root: int, members: Tuple[int, ...], ranks_per_node: Optional[int]
+) -> Dict[int, Tuple[Optional[int], Tuple[int, ...]]]:
+    """Map each member to (parent, children) in the node-aware collective tree.
+
+    Each node's leader is the root if the root lives there, else its lowest
+    member. Leaders form a binomial tree rooted at root and each leader roots
+    a binomial tree over its node, so payloads only cross between nodes on
+    leader-to-leader edges. Without node information every rank is its own
+    node and this is a plain binomial tree.
+    """
+    groups: Dict[int, list[int]] = {}
+    for member in members:
+        groups.setdefault(node_of(member, ranks_per_node), []).append(member)
+    leaders = [root if root in group else group[0] for group in groups.values()]
+
+    parents: Dict[int, Optional[int]] = {member: None for member in members}
+    children: Dict[int, list[int]] = {member: [] for member in members}
+    for member, parent, kids in _binomial_links(root, leaders):
+        parents[member] = parent
+        children[member].extend(kids)
+    for group, leader in zip(groups.values(), leaders):
+        for member, parent, kids in _binomial_links(leader, group):
+            if parent is not None:
+                parents[member] = parent
+            children[member].extend(kids)
+    return {member: (parents[member], tuple(children[member])) for member in members}
+
+
+def _subtree(tree: Dict[int, Tuple[Optional[int], Tuple[int, ...]]], top: int) -> list[int]:
+    found = [top]
+    for member in found:
+        found.extend(tree[member][1])
+    return found
 
 
 class LocalComm:
@@ -97,9 +276,20 @@ class LocalComm:
     def recv(self, source: Optional[int] = None, tag: Optional[int] = None, timeout: Optional[float] = None):
         raise RuntimeError("recv not available in LocalComm")
 
-    def bcast(self, value, root: int = 0):
+    def isend(self, obj, dest: int, tag: int = TAG_USER) -> Request:
+        raise RuntimeError("isend not available in LocalComm")
+
+    def irecv(self, source: Optional[int] = None, tag: Optional[int] = None) -> Request:
+        raise RuntimeError("irecv not available in LocalComm")
+
+    def bcast(self, value, root: int = 0, ranks: Optional[Sequence[int]] = None, tag: int = TAG_BCAST):
         return value
 
+    def ibcast(self, value, root: int = 0, ranks: Optional[Sequence[int]] = None, tag: int = TAG_BCAST) -> Request:
+        req = Request()
+        req._complete(value)
+        return req
+
     def scatter(self, values, root: int = 0):
         return values[0]
 
@@ -110,6 +300,22 @@ class LocalComm:
         return
 
 
+def get_comm_world():
+    """The current world communicator, or None outside a job.
+
+    Read this instead of importing COMM_WORLD, which binds whatever it was when
+    the importing module loaded. Under mpiexec with mpi4py installed, the MPI
+    backend is brought up here on first use.
+    """
+    global COMM_WORLD
+    if COMM_WORLD is None and _env_rank() is None:
+        from . import mpi_backend
+
+        if mpi_backend.available():
+            COMM_WORLD = mpi_backend.MPIComm()
+    return COMM_WORLD
+
+
 def _env_rank() -> Optional[int]:
     val = os.environ.get("MPI_RANK")
     if val is None:
@@ -124,19 +330,33 @@ def init() -> Comm:
     size = int(os.environ["MPI_WORLD_SIZE"])
     host = os.environ["MPI_MASTER_HOST"]
     port = int(os.environ["MPI_MASTER_PORT"])
-    transport = connect_to_master(host, port, rank, _CANCEL_EVENT)
-    comm = Comm(rank=rank, size=size, transport=transport)
+    ranks_per_node = os.environ.get("MPI_RANKS_PER_NODE")
+    ranks_per_node = int(ranks_per_node) if ranks_per_node else None
+    local_ranks = [r for r in range(1, size) if node_of(r, ranks_per_node) == node_of(rank, ranks_per_node)]
+    compress = os.environ.get("MPI_COMPRESS") == "1"
+    transport = connect_to_master(host, port, rank, _CANCEL_EVENT, local_ranks=local_ranks, compress=compress)
+    comm = Comm(rank=rank, size=size, transport=transport, ranks_per_node=ranks_per_node)
     global COMM_WORLD
     COMM_WORLD = comm
     return comm
 
 
 def init_master(cfg: InfraConfig, module: str, function: str, args, kwargs) -> Comm:
+    # encoded before any worker starts, so args that cannot be pickled fail
+    # the run() call without leaving ranks waiting for them
+    run_args = encode_args(args, kwargs)
     expected_workers = cfg.num_worker_nodes * cfg.per_node_cores
-    router = MasterRouter(cfg.master_node, 0, expected_workers=expected_workers)
-    world_size = launch_workers(cfg, cfg.master_node, router.actual_port, module, function, args, kwargs)
-    router.accept_all(cfg.connect_timeout_s)
-    comm = Comm(rank=0, size=world_size, transport=router)
+    router = MasterRouter(cfg.master_node, 0, expected_workers=expected_workers, compress=cfg.compress)
+    try:
+        world_size = launch_workers(cfg, cfg.master_node, router.actual_port, module, function)
+        router.accept_all(cfg.connect_timeout_s)
+        # args go over the job's own connections rather than the ssh command line,
+        # which caps their size and would need them text-encoded
+        router.send_run_args(run_args)
+    except BaseException:
+        router.close()
+        raise
+    comm = Comm(rank=0, size=world_size, transport=router, ranks_per_node=cfg.per_node_cores)
     global COMM_WORLD
     COMM_WORLD = comm
     return comm
@@ -163,6 +383,13 @@ def raise_if_cancelled() -> None:
 
 def run(fn: Callable[..., Any], *args, **kwargs):
     global _JOB_ACTIVE, COMM_WORLD
+    comm = get_comm_world()
+    if comm is not None and not isinstance(comm, Comm):
+        # mpiexec already started every rank; each one runs fn itself
+        result = fn(*args, **kwargs)
+        comm.barrier()
+        return result
+
     cfg = get_config()
     if cfg is None:
         raise ConfigError("configure_infra must be called before run")
@@ -181,7 +408,13 @@ def run(fn: Callable[..., Any], *args, **kwargs):
     start = time.time() if cfg.time_job else None
     module = fn.__module__
     function = fn.__name__
-    comm = init_master(cfg, module, function, args, kwargs)
+    try:
+        comm = init_master(cfg, module, function, args, kwargs)
+    except BaseException:
+        # the job never started, so the config stays in place for another run()
+        with _JOB_LOCK:
+            _JOB_ACTIVE = False
+        raise
     try:
         result = fn(*args, **kwargs)
     finally:
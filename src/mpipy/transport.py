@@ -2,19 +2,39 @@
 
 from __future__ import annotations
 
-import base64
+import errno
+import functools
 import os
-import queue
+import selectors
 import socket
+import tempfile
 import threading
 import time
+import types
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
-
-from .protocol import MsgType, dumps, loads, pack_message, unpack_header
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from .protocol import (
+    DATA_TYPES,
+    HEADER_STRUCT,
+    NDARRAY_STRUCT,
+    MsgType,
+    byte_view,
+    compress_parts,
+    decode_payload,
+    dumps,
+    empty_ndarray,
+    encode_parts,
+    loads,
+    ndarray_descriptor_size,
+    pack_message,
+    unpack_header,
+)
 
 
 HELLO_TAG = 100
+ARGS_TAG = 101
 
 
 class TransportError(RuntimeError):
@@ -29,72 +49,466 @@ class Message:
     payload: object
 
 
+class _Failed:
+    """Stands in for a payload that arrived but could not be decoded; recv() raises its error."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class _Mailbox:
+    """Received messages waiting for a matching recv().
+
+    Receive threads append and wake any waiter; a waiter takes the oldest
+    message matching its tag and source. Unmatched messages stay in arrival
+    order, so messages between any two ranks are received in the order sent.
+
+    put() takes no lock unless a recv() is blocked: messages land in
+    `_incoming` (deque appends are atomic) and waiters file them by tag under
+    the condition before matching, so recv(tag) never walks past messages for
+    other tags. Each message keeps its arrival number, which recv(tag=None)
+    uses to pick the oldest match across tags.
+    """
+
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._incoming: deque[Message] = deque()
+        self._by_tag: Dict[int, deque[Tuple[int, Message]]] = {}
+        self._seq = 0
+        self._waiting = 0
+
+    def put(self, msg: Message) -> None:
+        self._incoming.append(msg)
+        # a waiter bumps _waiting before its last look at _incoming, so
+        # either it sees this message or this put sees it waiting
+        if self._waiting:
+            with self._cv:
+                self._cv.notify_all()
+
+    def _drain(self) -> None:
+        incoming = self._incoming
+        while incoming:
+            msg = incoming.popleft()
+            bucket = self._by_tag.get(msg.tag)
+            if bucket is None:
+                bucket = self._by_tag[msg.tag] = deque()
+            bucket.append((self._seq, msg))
+            self._seq += 1
+
+    def _take(self, tag: Optional[int], source: Optional[int]) -> Optional[Message]:
+        best = None
+        for bucket_tag in (self._by_tag if tag is None else (tag,)):
+            bucket = self._by_tag.get(bucket_tag)
+            if not bucket:
+                continue
+            for i, (seq, msg) in enumerate(bucket):
+                if source is None or msg.src == source:
+                    if best is None or seq < best[0]:
+                        best = (seq, bucket_tag, i)
+                    break
+        if best is None:
+            return None
+        _seq, bucket_tag, i = best
+        bucket = self._by_tag[bucket_tag]
+        msg = bucket[i][1]
+        del bucket[i]
+        if not bucket:
+            # drop empty buckets so recv(tag=None) only visits live tags
+            del self._by_tag[bucket_tag]
+        return msg
+
+    def get(self, tag: Optional[int], source: Optional[int], timeout: Optional[float]) -> Message:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cv:
+            while True:
+                self._drain()
+                msg = self._take(tag, source)
+                if msg is not None:
+                    if isinstance(msg.payload, _Failed):
+                        raise msg.payload.error
+                    return msg
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("recv timed out")
+                self._waiting += 1
+                try:
+                    if not self._incoming:
+                        self._cv.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+
 class WorkerTransport:
-    def __init__(self, sock: socket.socket, rank: int, cancel_event: threading.Event):
+    def __init__(
+        self,
+        sock: socket.socket,
+        rank: int,
+        cancel_event: threading.Event,
+        peers: Optional[Dict[int, socket.socket]] = None,
+        compress: bool = False,
+    ):
         self.sock = sock
         self.rank = rank
         self.cancel_event = cancel_event
-        self.inbox: queue.Queue[Message] = queue.Queue()
-        self._recv_thread = threading.Thread(target=self._recv_loop, daemon=True)
+        self.compress = compress
+        # direct links to ranks on the same node; everything else goes through the master
+        self._peers: Dict[int, socket.socket] = dict(peers or {})
+        self._send_locks = {s: threading.Lock() for s in [sock, *self._peers.values()]}
+        self._mailbox = _Mailbox()
+        self._control = _Mailbox()
+        # the master link and all peer links share one receive thread
+        sel = selectors.DefaultSelector()
+        for s in self._send_locks:
+            sel.register(s, selectors.EVENT_READ, data=_ReadState(rank))
+        self._recv_thread = threading.Thread(target=_run_reactor, args=(sel, self._dispatch), daemon=True)
         self._recv_thread.start()
 
-    def _recv_loop(self):
-        try:
-            while True:
-                header = self._recv_exact(17)
-                if not header:
-                    return
-                length, msg_type, src, dest, tag = unpack_header(header)
-                payload = self._recv_exact(length) if length else b""
-                if msg_type == MsgType.DATA:
-                    self.inbox.put(Message(src=src, dest=dest, tag=tag, payload=loads(payload)))
-                elif msg_type == MsgType.CONTROL and tag == CANCEL_TAG:
-                    self.cancel_event.set()
-        except OSError:
+    def _dispatch(self, msg_type: MsgType, src: int, dest: int, tag: int, payload, decoded: bool):
+        if msg_type in DATA_TYPES:
+            if not decoded:
+                payload = _decode_or_fail(msg_type, payload)
+            self._mailbox.put(Message(src=src, dest=dest, tag=tag, payload=payload))
+        elif msg_type == MsgType.CONTROL and tag == CANCEL_TAG:
+            self.cancel_event.set()
+        elif msg_type == MsgType.CONTROL and tag == ARGS_TAG:
+            self._control.put(Message(src=src, dest=dest, tag=tag, payload=payload))
+
+    def send(self, dest: int, tag: int, obj):
+        msg_type, parts = encode_parts(obj)
+        if self.compress:
+            msg_type, parts = compress_parts(msg_type, parts)
+        target = self._peers.get(dest, self.sock)
+        with self._send_locks[target]:
+            _send_framed(target, msg_type, self.rank, dest, tag, parts)
+
+    def recv(self, tag: Optional[int] = None, timeout: Optional[float] = None, source: Optional[int] = None) -> Message:
+        return self._mailbox.get(tag, source, timeout)
+
+    def recv_run_args(self, timeout: Optional[float] = None) -> bytes:
+        """The encoded job arguments the master sends once every rank is connected."""
+        return self._control.get(ARGS_TAG, 0, timeout).payload
+
+
+def _decode_or_fail(msg_type: MsgType, payload):
+    # a payload that cannot be decoded (a class missing on this node, lz4 not
+    # installed, ...) fails the recv() that would have returned it, not the reactor
+    try:
+        return decode_payload(msg_type, payload)
+    except Exception as exc:
+        return _Failed(exc)
+
+
+_SEND_STATE = threading.local()
+
+# bound once so the per-frame paths skip the attribute lookups; the raw type
+# byte is compared against MsgType directly instead of building an enum
+_pack_header_into = HEADER_STRUCT.pack_into
+_unpack_header_from = HEADER_STRUCT.unpack_from
+
+
+def _send_framed(sock: socket.socket, msg_type: MsgType, src: int, dest: int, tag: int, parts) -> None:
+    """Send one frame whose payload is the byte buffers in parts; the caller holds the socket's send lock."""
+    # each sending thread packs into its own reusable header
+    header = getattr(_SEND_STATE, "header", None)
+    if header is None:
+        header = _SEND_STATE.header = bytearray(HEADER_STRUCT.size)
+    _pack_header_into(header, 0, sum(len(p) for p in parts), msg_type, src, dest, tag)
+    _sendmsg_all(sock, [header, *parts])
+
+
+def _sendmsg_all(sock: socket.socket, buffers) -> None:
+    # the kernel gathers header and payload itself, so the payload is never
+    # copied into a joined frame; sendmsg can stop short, so resend the rest
+    views = [memoryview(b) for b in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= views[0].nbytes:
+            sent -= views[0].nbytes
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
+# forwarded frames queued for one worker are written together once this many
+# bytes or frames are waiting, or when the reactor runs out of ready sockets
+_OUTQ_FLUSH_BYTES = 1 << 16
+_OUTQ_FLUSH_FRAMES = 16
+
+
+class _OutQ:
+    """Frames the reactor is forwarding to one socket, sent with a single sendmsg.
+
+    While `busy` a large frame is being passed through to the socket piece by
+    piece, and queued frames wait until it is complete.
+    """
+
+    __slots__ = ("sock", "lock", "pending", "bytes", "busy")
+
+    def __init__(self, sock: socket.socket, lock: threading.Lock):
+        self.sock = sock
+        self.lock = lock
+        self.pending: list = []
+        self.bytes = 0
+        self.busy = False
+
+    def enqueue(self, msg_type: MsgType, src: int, dest: int, tag: int, payload) -> None:
+        # only the reactor thread enqueues, so pending needs no lock of its own
+        self.pending.append(HEADER_STRUCT.pack(len(payload), msg_type, src, dest, tag))
+        self.pending.append(payload)
+        self.bytes += HEADER_STRUCT.size + len(payload)
+        if self.bytes >= _OUTQ_FLUSH_BYTES or len(self.pending) >= 2 * _OUTQ_FLUSH_FRAMES:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending or self.busy:
             return
+        pending, self.pending, self.bytes = self.pending, [], 0
+        with self.lock:
+            _sendmsg_all(self.sock, pending)
 
-    def _recv_exact(self, length: int) -> bytes:
-        buf = b""
-        while len(buf) < length:
-            chunk = self.sock.recv(length - len(buf))
-            if not chunk:
-                return b""
-            buf += chunk
-        return buf
 
-    def send(self, dest: int, tag: int, obj):
-        payload = dumps(obj)
-        msg = pack_message(MsgType.DATA, src=self.rank, dest=dest, tag=tag, payload=payload)
-        self.sock.sendall(msg)
+_REACTOR_READ_BYTES = 1 << 16
 
-    def recv(self, tag: Optional[int] = None, timeout: Optional[float] = None) -> Message:
-        start = time.time()
-        while True:
+_HEADER, _PAYLOAD, _DESCRIPTOR_FIXED, _DESCRIPTOR_REST, _ARRAY, _SPLICE = range(6)
+
+
+class _ReadState:
+    """Incremental frame parser for one socket served by a reactor.
+
+    NDARRAY frames addressed to `rank` are decoded in place: after the
+    descriptor arrives the array is allocated and the rest of the frame is
+    received straight into its memory. Other frames are handed on as raw
+    payload bytes, except that a large frame for another rank, when
+    `splice(dest)` allows it, stops in the _SPLICE stage holding only the
+    payload bytes already read, for the reactor to pass the rest through.
+    """
+
+    __slots__ = ("rank", "splice", "header", "stage", "frame", "length", "descriptor", "array", "target", "got", "error")
+
+    def __init__(self, rank: int, splice: Optional[Callable[[int], bool]] = None):
+        self.rank = rank
+        self.splice = splice
+        self.header = bytearray(HEADER_STRUCT.size)
+        self.frame: Optional[Tuple[MsgType, int, int, int]] = None
+        self.length = 0
+        self.descriptor = b""
+        self.array = None
+        # set when the stream cannot be parsed any further
+        self.error: Optional[Exception] = None
+        self._expect(_HEADER, self.header)
+
+    def _expect(self, stage: int, buf) -> None:
+        self.stage = stage
+        self.target = memoryview(buf)
+        self.got = 0
+
+    def direct_view(self) -> Optional[memoryview]:
+        # a large payload remainder is received straight into its buffer
+        # instead of going through the reactor's scratch buffer
+        remaining = len(self.target) - self.got
+        if self.stage in (_PAYLOAD, _ARRAY) and remaining >= _REACTOR_READ_BYTES:
+            return self.target[self.got:]
+        return None
+
+    def advance(self, n: int) -> list:
+        self.got += n
+        if self.got < len(self.target):
+            return []
+        try:
+            return self._complete()
+        except Exception as exc:
+            self.error = exc
+            return []
+
+    def feed(self, data: memoryview) -> list:
+        frames = []
+        pos = 0
+        while pos < len(data):
+            take = min(len(self.target) - self.got, len(data) - pos)
+            self.target[self.got:self.got + take] = data[pos:pos + take]
+            self.got += take
+            pos += take
+            if self.got == len(self.target):
+                try:
+                    frames.extend(self._complete())
+                except Exception as exc:
+                    # frames completed before the bad one are still delivered
+                    self.error = exc
+                    break
+        return frames
+
+    def _complete(self) -> list:
+        if self.stage == _HEADER:
+            self.length, msg_type, src, dest, tag = _unpack_header_from(self.header)
+            self.frame = (msg_type, src, dest, tag)
+            if msg_type == MsgType.NDARRAY and dest == self.rank and self.length:
+                self._expect(_DESCRIPTOR_FIXED, bytearray(NDARRAY_STRUCT.size))
+            elif (
+                self.splice is not None
+                and dest != self.rank
+                and msg_type in DATA_TYPES
+                and self.length >= _REACTOR_READ_BYTES
+                and self.splice(dest)
+            ):
+                # the prefix buffer can never fill: at most one scratch read
+                # minus this header lands in it before the reactor takes over
+                self._expect(_SPLICE, bytearray(_REACTOR_READ_BYTES))
+            elif self.length:
+                self._expect(_PAYLOAD, bytearray(self.length))
+            else:
+                return self._finish(b"", decoded=False)
+            return []
+        if self.stage == _PAYLOAD:
+            return self._finish(self.target.obj, decoded=False)
+        if self.stage == _DESCRIPTOR_FIXED:
+            self.descriptor = self.target.obj
+            self._expect(_DESCRIPTOR_REST, bytearray(ndarray_descriptor_size(self.descriptor) - len(self.descriptor)))
+            return []
+        if self.stage == _DESCRIPTOR_REST:
+            descriptor = self.descriptor + self.target.obj
+            arr = empty_ndarray(descriptor)
+            if len(descriptor) + arr.nbytes != self.length:
+                raise TransportError("Malformed ndarray frame")
+            if not arr.nbytes:
+                return self._finish(arr, decoded=True)
+            self.array = arr
+            self._expect(_ARRAY, byte_view(arr))
+            return []
+        arr, self.array = self.array, None
+        return self._finish(arr, decoded=True)
+
+    def _finish(self, payload, decoded: bool) -> list:
+        frame = (*self.frame, payload, decoded)
+        self.reset()
+        return [frame]
+
+    def reset(self) -> None:
+        self.frame = None
+        self._expect(_HEADER, self.header)
+
+
+def _run_reactor(sel: selectors.BaseSelector, dispatch, forward_spliced=None, flush=None) -> None:
+    # one thread serves every registered socket: each ready socket gets a single
+    # recv, and its _ReadState hands back any frames that completed; a frame
+    # in the _SPLICE stage is moved along by forward_spliced(sock, state) each
+    # time its socket is ready, and flush() runs once every ready socket has
+    # been served
+    scratch = memoryview(bytearray(_REACTOR_READ_BYTES))
+    while sel.get_map():
+        for key, _events in sel.select():
+            sock, state = key.fileobj, key.data
+            if state.stage == _SPLICE:
+                try:
+                    forward_spliced(sock, state)
+                except OSError:
+                    sel.unregister(sock)
+                continue
+            direct = state.direct_view()
             try:
-                msg = self.inbox.get(timeout=0.1)
-            except queue.Empty:
-                if timeout is not None and time.time() - start > timeout:
-                    raise TimeoutError("recv timed out")
+                n = sock.recv_into(direct if direct is not None else scratch)
+            except OSError:
+                n = 0
+            if not n:
+                sel.unregister(sock)
                 continue
-            if tag is None or msg.tag == tag:
-                return msg
-            self.inbox.put(msg)
+            frames = state.advance(n) if direct is not None else state.feed(scratch[:n])
+            for frame in frames:
+                # one bad frame must not stop the reactor serving every other socket
+                try:
+                    dispatch(*frame)
+                except Exception:
+                    pass
+            if state.error is not None:
+                # the rest of this socket's stream cannot be framed; the recv()
+                # waiting on the broken frame gets the error instead of hanging
+                sel.unregister(sock)
+                msg_type, src, dest, tag = state.frame
+                if dest == state.rank:
+                    try:
+                        dispatch(msg_type, src, dest, tag, _Failed(state.error), True)
+                    except Exception:
+                        pass
+                continue
+            if state.stage == _SPLICE:
+                try:
+                    forward_spliced(sock, state)
+                except OSError:
+                    sel.unregister(sock)
+        if flush is not None:
+            flush()
+    sel.close()
+
+
+def _env_cpus(name: str) -> Optional[set]:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    return {int(cpu) for cpu in value.split(",") if cpu.strip()}
+
+
+def _run_pinned(cpus: Optional[set], target, *args) -> None:
+    # pid 0 is the calling thread, so only this thread moves; keeping it near
+    # the NIC's interrupt CPUs keeps the socket buffers in a warm cache
+    if cpus and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+    target(*args)
+
+
+_PIPE_BYTES = 1 << 16
+
+
+class _Passthrough:
+    """A large frame the router is passing from one worker socket to another."""
+
+    __slots__ = ("dest", "target", "remaining")
+
+    def __init__(self, dest: int, remaining: int):
+        self.dest = dest
+        # None once there is nowhere to send the rest; it is then read and dropped
+        self.target: Optional[socket.socket] = None
+        self.remaining = remaining
 
 
 class MasterRouter:
-    def __init__(self, host: str, port: int, expected_workers: int):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        expected_workers: int,
+        compress: bool = False,
+        cpu_affinity: Optional[Iterable[int]] = None,
+    ):
         self.host = host
         self.port = port
         self.expected_workers = expected_workers
+        self.compress = compress
+        # CPUs the routing thread is confined to; MPIPY_REACTOR_CPUS="0,2" by default
+        self.cpu_affinity = set(cpu_affinity) if cpu_affinity is not None else _env_cpus("MPIPY_REACTOR_CPUS")
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # buffer sizes set before listen() carry over to accepted sockets
+        _tune_socket(self.server)
         self.server.bind((host, port))
         self.server.listen()
         self.actual_port = self.server.getsockname()[1]
 
-        self.inbox: queue.Queue[Message] = queue.Queue()
+        self._mailbox = _Mailbox()
         self._connections: Dict[int, socket.socket] = {}
+        self._send_locks: Dict[int, threading.Lock] = {}
+        self._outqs: Dict[int, _OutQ] = {}
         self._threads: list[threading.Thread] = []
+        # only the reactor thread passes frames through, so one pipe and one
+        # buffer serve every forward
+        self._pipe = os.pipe() if hasattr(os, "splice") else None
+        self._scratch = memoryview(bytearray(_PIPE_BYTES))
+        self._passing: Dict[socket.socket, _Passthrough] = {}
 
     def accept_all(self, timeout_s: float):
         end = time.time() + timeout_s
@@ -105,99 +519,369 @@ class MasterRouter:
                 client, _addr = self.server.accept()
             except socket.timeout:
                 raise TransportError("Timed out waiting for workers to connect")
+            _tune_socket(client)
             rank = self._handshake(client)
             if rank in self._connections:
                 client.close()
                 raise TransportError(f"Duplicate rank connected: {rank}")
+            self._send_locks[rank] = threading.Lock()
             self._connections[rank] = client
-            t = threading.Thread(target=self._route_loop, args=(rank, client), daemon=True)
-            t.start()
-            self._threads.append(t)
+            self._outqs[rank] = _OutQ(client, self._send_locks[rank])
+        # routing starts only once every rank is connected; workers may
+        # address peers that have not finished their handshake yet
+        sel = selectors.DefaultSelector()
+        for client in self._connections.values():
+            sel.register(client, selectors.EVENT_READ, data=_ReadState(0, splice=self._can_splice if self._pipe is not None else None))
+        t = threading.Thread(
+            target=_run_pinned,
+            args=(self.cpu_affinity, _run_reactor, sel, self._dispatch, self._forward_spliced, self._flush),
+            daemon=True,
+        )
+        t.start()
+        self._threads.append(t)
 
     def _handshake(self, client: socket.socket) -> int:
-        header = self._recv_exact(client, 17)
-        length, msg_type, src, _dest, tag = unpack_header(header)
-        if msg_type != MsgType.CONTROL or tag != HELLO_TAG:
-            raise TransportError("Invalid handshake from worker")
-        payload = self._recv_exact(client, length)
-        data = loads(payload)
-        return int(data["rank"])
-
-    def _route_loop(self, rank: int, sock: socket.socket):
+        return _read_hello(client)
+
+    def _dispatch(self, msg_type: MsgType, src: int, dest: int, tag: int, payload, decoded: bool):
+        if msg_type not in DATA_TYPES:
+            return
+        if dest == 0:
+            if not decoded:
+                payload = _decode_or_fail(msg_type, payload)
+            self._mailbox.put(Message(src=src, dest=dest, tag=tag, payload=payload))
+        else:
+            # forward the received bytes as they are; nothing is re-pickled, and
+            # a burst for one worker goes out in one sendmsg
+            outq = self._outqs.get(dest)
+            if outq is not None:
+                outq.enqueue(msg_type, src, dest, tag, payload)
+
+    def _flush(self):
+        for outq in self._outqs.values():
+            try:
+                outq.flush()
+            except OSError:
+                pass
+
+    def _can_splice(self, dest: int) -> bool:
+        # one pass-through per destination at a time; another large frame for
+        # it is buffered and queued behind
+        outq = self._outqs.get(dest)
+        return outq is None or not outq.busy
+
+    def _forward_spliced(self, sock: socket.socket, state: _ReadState):
+        # a large frame moves a pipe's worth at a time as its bytes arrive, so
+        # one slow sender never holds up the reactor's other sockets
+        passing = self._passing.get(sock)
+        if passing is None:
+            self._passing[sock] = self._start_passthrough(state)
+            return
         try:
-            while True:
-                header = self._recv_exact(sock, 17)
-                if not header:
-                    return
-                length, msg_type, src, dest, tag = unpack_header(header)
-                payload = self._recv_exact(sock, length) if length else b""
-                if msg_type == MsgType.DATA:
-                    if dest == 0:
-                        self.inbox.put(Message(src=src, dest=dest, tag=tag, payload=loads(payload)))
-                    else:
-                        target = self._connections.get(dest)
-                        if target is None:
-                            raise TransportError(f"Unknown destination rank {dest}")
-                        target.sendall(pack_message(MsgType.DATA, src=src, dest=dest, tag=tag, payload=payload))
+            moved = self._pass_chunk(sock, passing)
         except OSError:
+            self._end_passthrough(sock, passing)
+            raise
+        if moved is None:
             return
-
-    def _recv_exact(self, sock: socket.socket, length: int) -> bytes:
-        buf = b""
-        while len(buf) < length:
-            chunk = sock.recv(length - len(buf))
-            if not chunk:
-                return b""
-            buf += chunk
-        return buf
+        if not moved:
+            self._end_passthrough(sock, passing)
+            raise ConnectionError("peer closed mid-frame")
+        passing.remaining -= moved
+        if not passing.remaining:
+            self._end_passthrough(sock, passing)
+            state.reset()
+
+    def _start_passthrough(self, state: _ReadState) -> _Passthrough:
+        msg_type, src, dest, tag = state.frame
+        passing = _Passthrough(dest, state.length - state.got)
+        outq = self._outqs.get(dest)
+        if outq is None:
+            return passing
+        try:
+            # frames from the same source may still be queued ahead of this one
+            outq.flush()
+        except OSError:
+            return passing
+        # the lock stays held until the frame is complete, so the master's own
+        # sends cannot interleave with it
+        outq.lock.acquire()
+        outq.busy = True
+        passing.target = outq.sock
+        try:
+            _sendmsg_all(outq.sock, [HEADER_STRUCT.pack(state.length, msg_type, src, dest, tag), state.target[:state.got]])
+        except OSError:
+            self._release_target(passing)
+        return passing
+
+    def _pass_chunk(self, sock: socket.socket, passing: _Passthrough) -> Optional[int]:
+        """Move what has arrived of the frame: bytes taken from sock, 0 at EOF, None if nothing was ready."""
+        count = min(passing.remaining, _PIPE_BYTES)
+        if passing.target is not None and self._pipe is not None:
+            rfd, wfd = self._pipe
+            try:
+                n = os.splice(sock.fileno(), wfd, count, flags=os.SPLICE_F_NONBLOCK)
+            except BlockingIOError:
+                return None
+            except OSError as exc:
+                unsupported = exc.errno in (errno.EINVAL, errno.ENOSYS)
+                self._reset_pipe(reopen=not unsupported)
+                if not unsupported:
+                    raise
+            else:
+                try:
+                    left = n
+                    while left:
+                        left -= os.splice(rfd, passing.target.fileno(), left)
+                except OSError:
+                    # what is left in the pipe belongs to this frame; a fresh
+                    # pipe keeps it out of the next one
+                    self._reset_pipe(reopen=True)
+                    self._release_target(passing)
+                return n
+        try:
+            n = sock.recv_into(self._scratch[:count])
+        except BlockingIOError:
+            return None
+        if n and passing.target is not None:
+            try:
+                _sendmsg_all(passing.target, [self._scratch[:n]])
+            except OSError:
+                self._release_target(passing)
+        return n
+
+    def _release_target(self, passing: _Passthrough):
+        # the destination is done with, or failed; the source keeps being read
+        # until the frame ends so its stream stays in step
+        outq = self._outqs[passing.dest]
+        passing.target = None
+        outq.busy = False
+        outq.lock.release()
+
+    def _end_passthrough(self, sock: socket.socket, passing: _Passthrough):
+        del self._passing[sock]
+        if passing.target is not None:
+            self._release_target(passing)
+
+    def _reset_pipe(self, reopen: bool):
+        for fd in self._pipe:
+            os.close(fd)
+        self._pipe = os.pipe() if reopen else None
 
     def send(self, dest: int, tag: int, obj):
-        payload = dumps(obj)
-        msg = pack_message(MsgType.DATA, src=0, dest=dest, tag=tag, payload=payload)
-        target = self._connections.get(dest)
-        if target is None:
-            raise TransportError(f"Unknown destination rank {dest}")
-        target.sendall(msg)
+        msg_type, parts = encode_parts(obj)
+        if self.compress:
+            msg_type, parts = compress_parts(msg_type, parts)
+        self._send_to(dest, msg_type, 0, tag, parts)
 
     def send_control(self, dest: int, tag: int, obj=None):
-        payload = dumps(obj) if obj is not None else b""
-        msg = pack_message(MsgType.CONTROL, src=0, dest=dest, tag=tag, payload=payload)
+        parts = (dumps(obj),) if obj is not None else _EMPTY_PARTS
+        self._send_to(dest, MsgType.CONTROL, 0, tag, parts)
+
+    def send_run_args(self, payload: bytes):
+        # pickled once and written to each worker as is
+        for dest in self._connections:
+            self._send_to(dest, MsgType.CONTROL, 0, ARGS_TAG, (payload,))
+
+    def _send_to(self, dest: int, msg_type: MsgType, src: int, tag: int, parts):
+        # route threads, the master and its sender thread can all write to one
+        # worker socket; the lock keeps their frames from interleaving
         target = self._connections.get(dest)
         if target is None:
             raise TransportError(f"Unknown destination rank {dest}")
-        target.sendall(msg)
+        with self._send_locks[dest]:
+            _send_framed(target, msg_type, src, dest, tag, parts)
 
-    def recv(self, tag: Optional[int] = None, timeout: Optional[float] = None) -> Message:
-        start = time.time()
-        while True:
+    def recv(self, tag: Optional[int] = None, timeout: Optional[float] = None, source: Optional[int] = None) -> Message:
+        return self._mailbox.get(tag, source, timeout)
+
+    def close(self):
+        """Tear down a router whose job failed to start; connected workers see their link close."""
+        self.server.close()
+        for sock in self._connections.values():
             try:
-                msg = self.inbox.get(timeout=0.1)
-            except queue.Empty:
-                if timeout is not None and time.time() - start > timeout:
-                    raise TimeoutError("recv timed out")
-                continue
-            if tag is None or msg.tag == tag:
-                return msg
-            self.inbox.put(msg)
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        # the reactor unregisters each socket as it reads the shutdown, then exits
+        for t in self._threads:
+            t.join(1.0)
+        for sock in self._connections.values():
+            sock.close()
 
 
 CANCEL_TAG = 200
 
 
-def connect_to_master(host: str, port: int, rank: int, cancel_event: threading.Event) -> WorkerTransport:
+_SOCKET_BUFFER_BYTES = 4 << 20
+
+
+def _tune_socket(sock: socket.socket) -> None:
+    # frames are written whole, so Nagle only delays small control and
+    # collective messages; larger buffers keep big panels flowing per syscall
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    quickack = getattr(socket, "TCP_QUICKACK", None)
+    if quickack is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, quickack, 1)
+        except OSError:
+            pass
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_BYTES)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_BYTES)
+
+
+# payload of argument-less control frames such as the cancel broadcast
+_EMPTY_PARTS = (b"",)
+
+
+@functools.lru_cache(maxsize=None)
+def _hello_frame(rank: int) -> bytes:
+    # the same frame is sent to the master and to every local peer
+    return pack_message(MsgType.CONTROL, src=rank, dest=0, tag=HELLO_TAG, payload=dumps({"rank": rank}))
+
+
+def _read_hello(sock: socket.socket) -> int:
+    header = _recv_all(sock, HEADER_STRUCT.size)
+    length, msg_type, _src, _dest, tag = unpack_header(header)
+    if msg_type != MsgType.CONTROL or tag != HELLO_TAG:
+        raise TransportError("Invalid handshake from peer")
+    return int(loads(_recv_all(sock, length))["rank"])
+
+
+def _recv_all(sock: socket.socket, length: int) -> bytes:
+    buf = bytearray(length)
+    if not _recv_into(sock, buf):
+        raise TransportError("Peer closed during handshake")
+    return buf
+
+
+# lets one recv wait in the kernel for the whole buffer instead of returning
+# whatever arrived first; signals, timeouts and closes still return short
+_MSG_WAITALL = getattr(socket, "MSG_WAITALL", 0)
+
+
+def _recv_into(sock: socket.socket, buf: bytearray) -> bool:
+    # fill buf in place; False if the peer closed before it was full
+    view = memoryview(buf)
+    got = 0
+    while got < len(buf):
+        n = sock.recv_into(view[got:], 0, _MSG_WAITALL)
+        if not n:
+            return False
+        got += n
+    return True
+
+
+def _peer_path(host: str, port: int, rank: int) -> str:
+    return os.path.join(tempfile.gettempdir(), f"mpipy-{host}-{port}-{rank}.sock")
+
+
+def _link_local_peers(host: str, port: int, rank: int, local_ranks, timeout_s: float) -> Dict[int, socket.socket]:
+    """Open unix-socket links to the other ranks on this node.
+
+    Every rank listens for its higher-numbered neighbours and dials the lower
+    ones, so each pair ends up with exactly one link.
+    """
+    higher = [r for r in local_ranks if r > rank]
+    lower = [r for r in local_ranks if r < rank]
+    peers: Dict[int, socket.socket] = {}
+    errors: list[BaseException] = []
+    listener = None
+    accept_thread = None
+    path = _peer_path(host, port, rank)
+    if higher:
+        if os.path.exists(path):
+            os.unlink(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(len(higher))
+        listener.settimeout(timeout_s)
+
+        def accept_higher():
+            try:
+                for _ in higher:
+                    client, _addr = listener.accept()
+                    client.settimeout(None)
+                    peers[_read_hello(client)] = client
+            except (OSError, TransportError) as exc:
+                errors.append(exc)
+
+        accept_thread = threading.Thread(target=accept_higher, daemon=True)
+        accept_thread.start()
+
+    deadline = time.time() + timeout_s
+    for peer in lower:
+        while True:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                conn.connect(_peer_path(host, port, peer))
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                conn.close()
+                if time.time() > deadline:
+                    raise TransportError(f"Timed out linking to local rank {peer}")
+                time.sleep(0.01)
+        conn.sendall(_hello_frame(rank))
+        peers[peer] = conn
+
+    if accept_thread is not None:
+        accept_thread.join()
+        listener.close()
+        os.unlink(path)
+    if errors:
+        raise TransportError(f"Failed to link local peers: {errors[0]}")
+    return peers
+
+
+def connect_to_master(
+    host: str,
+    port: int,
+    rank: int,
+    cancel_event: threading.Event,
+    local_ranks=(),
+    timeout_s: float = 10.0,
+    compress: bool = False,
+) -> WorkerTransport:
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    _tune_socket(sock)
     sock.connect((host, port))
-    hello = dumps({"rank": rank})
-    sock.sendall(pack_message(MsgType.CONTROL, src=rank, dest=0, tag=HELLO_TAG, payload=hello))
-    return WorkerTransport(sock, rank=rank, cancel_event=cancel_event)
+    sock.sendall(_hello_frame(rank))
+    peers = _link_local_peers(host, port, rank, local_ranks, timeout_s) if len(local_ranks) > 1 else {}
+    return WorkerTransport(sock, rank=rank, cancel_event=cancel_event, peers=peers, compress=compress)
+
+
+@dataclass(frozen=True)
+class _PickledFunction:
+    data: bytes
+
+
+@functools.lru_cache(maxsize=256)
+def _pickle_function(fn) -> bytes:
+    return dumps(fn)
+
+
+def _freeze_arg(value):
+    # plain functions pickle by qualified name, so their bytes never change and
+    # repeated jobs with the same sample_fn/eval_fn/reducers reuse them
+    if isinstance(value, (types.FunctionType, types.BuiltinFunctionType)):
+        return _PickledFunction(_pickle_function(value))
+    return value
+
+
+def _thaw_arg(value):
+    if isinstance(value, _PickledFunction):
+        return loads(value.data)
+    return value
 
 
-def encode_args(args, kwargs) -> str:
-    payload = dumps({"args": args, "kwargs": kwargs})
-    return base64.b64encode(payload).decode("ascii")
+def encode_args(args, kwargs) -> bytes:
+    frozen_args = [_freeze_arg(a) for a in args]
+    frozen_kwargs = {k: _freeze_arg(v) for k, v in kwargs.items()}
+    return dumps({"args": frozen_args, "kwargs": frozen_kwargs})
 
 
-def decode_args(data: str):
-    payload = base64.b64decode(data.encode("ascii"))
+def decode_args(payload: bytes):
     data = loads(payload)
-    return data.get("args", []), data.get("kwargs", {})
+    args = [_thaw_arg(a) for a in data.get("args", [])]
+    kwargs = {k: _thaw_arg(v) for k, v in data.get("kwargs", {}).items()}
+    return args, kwargs
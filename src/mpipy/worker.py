@@ -11,17 +11,21 @@ from .transport import decode_args
 
 
 def worker_main():
-    init()
+    comm = init()
     module = os.environ.get("MPI_RUN_MODULE")
     function = os.environ.get("MPI_RUN_FUNCTION")
     if not module or not function:
         raise RuntimeError("MPI_RUN_MODULE and MPI_RUN_FUNCTION must be set")
-    encoded = os.environ.get("MPI_RUN_ARGS", "")
-    args, kwargs = decode_args(encoded) if encoded else ([], {})
+    # the master sends the args once every rank has connected, within its own
+    # connect timeout; past that it has given up and this rank should exit
+    timeout = float(os.environ.get("MPI_CONNECT_TIMEOUT", "10.0"))
+    args, kwargs = decode_args(comm._transport.recv_run_args(timeout=timeout))
 
     mod = importlib.import_module(module)
     fn = getattr(mod, function)
     fn(*args, **kwargs)
+    # matches the barrier run() performs on rank 0 before tearing the job down
+    comm.barrier()
 
 
 if __name__ == "__main__":
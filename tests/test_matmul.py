@@ -2,7 +2,7 @@
 
 import numpy as np
 import pytest
-from mpipy.matmul import mat_mul
+from mpipy.matmul import _grid_order, _partition_ranges, mat_mul
 
 
 def test_matmul_small():
@@ -27,3 +27,34 @@ def test_matmul_rejects_bad_dims():
     with pytest.raises(ValueError):
         mat_mul(a, b)
 
+
+def test_grid_order_keeps_rows_on_one_node():
+    # rank 0 is node 0; ranks 1-4 and 5-8 are the two worker nodes
+    order = _grid_order(3, 3, ranks_per_node=4)
+    assert sorted(order) == list(range(9))
+    assert order[0:3] == (1, 2, 3)
+    assert order[3:6] == (5, 6, 7)
+    assert _grid_order(3, 3, ranks_per_node=None) == tuple(range(9))
+
+
+def test_partition_ranges_are_cached():
+    _partition_ranges.cache_clear()
+    assert _partition_ranges(10, 3) == ((0, 4), (4, 7), (7, 10))
+    assert _partition_ranges(10, 3) is _partition_ranges(10, 3)
+    assert _partition_ranges.cache_info().hits == 2
+
+
+def test_matmul_dtype_cast():
+    a = np.arange(6, dtype=np.float64).reshape(2, 3)
+    b = np.arange(6, dtype=np.float64).reshape(3, 2)
+    result = mat_mul(a, b, dtype=np.float32)
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(result, a @ b)
+
+
+def test_matmul_half_precision_keeps_dtype():
+    a = np.arange(6, dtype=np.float16).reshape(2, 3)
+    b = np.arange(6, dtype=np.float16).reshape(3, 2)
+    result = mat_mul(a, b)
+    assert result.dtype == np.float16
+    np.testing.assert_allclose(result, a.astype(np.float64) @ b.astype(np.float64))
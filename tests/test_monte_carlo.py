@@ -1,6 +1,6 @@
 """Basic unit tests for monte carlo."""
 import random
-from mpipy.monte_carlo import MonteCarloResult, monte_carlo
+from mpipy.monte_carlo import MonteCarloResult, monte_carlo, monte_carlo_vec
 
 def sample_uniform(rng: random.Random) -> float:
     return rng.random()
@@ -41,3 +41,31 @@ def test_monte_carlo_custom_reducer():
         seed=5,
     )
     assert 0.48 < result < 0.52
+
+
+def inside_unit_circle_batch(points):
+    return (points[:, 0] ** 2 + points[:, 1] ** 2 <= 1.0).astype(float)
+
+
+def test_monte_carlo_vec_default_sampler():
+    result = monte_carlo_vec(100_000, None, inside_unit_circle_batch, dims=2, batch_size=30_000, seed=7)
+    assert isinstance(result, MonteCarloResult)
+    assert abs(4.0 * result.mean - 3.14159) < 0.05
+    assert result.samples == 100_000
+
+
+def test_monte_carlo_batched_when_sample_fn_is_none():
+    result = monte_carlo(50_000, None, lambda batch: batch[:, 0], seed=11)
+    assert isinstance(result, MonteCarloResult)
+    assert abs(result.mean - 0.5) < 0.01
+    assert abs(result.variance - 1.0 / 12.0) < 0.005
+
+
+def test_monte_carlo_same_samples_for_any_cancel_interval():
+    results = [
+        monte_carlo(70_000, sample_uniform, identity, seed=3, cancel_check_every=every)
+        for every in (0, 7, 100_000)
+    ]
+    for result in results[1:]:
+        assert result.samples == 70_000
+        assert abs(result.mean - results[0].mean) < 1e-12
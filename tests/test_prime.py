@@ -1,6 +1,6 @@
 """Basic unit tests for the primality check."""
 
-from mpipy.prime import is_prime
+from mpipy.prime import _DETERMINISTIC_LIMIT, is_prime
 
 
 def test_small_primes():
@@ -19,4 +19,20 @@ def test_edge_cases():
 def test_large_primes():
     assert is_prime(99993) is False
 
-#test
\ No newline at end of file
+
+def test_strong_pseudoprimes_and_carmichael_numbers():
+    # each passes Miller-Rabin for every prime base up to at least 7, so only
+    # the later witnesses expose them
+    for n in (3215031751, 2152302898747, 3825123056546413051, 318665857834031151167461):
+        assert is_prime(n) is False
+
+
+def test_primes_past_trial_division():
+    assert is_prime(999999999989) is True
+    assert is_prime(2**89 - 1) is True
+
+
+def test_above_deterministic_limit():
+    assert 2**127 - 1 > _DETERMINISTIC_LIMIT
+    assert is_prime(2**127 - 1) is True
+    assert is_prime((2**61 - 1) * (2**89 - 1)) is False
@@ -0,0 +1,83 @@
+"""Basic unit tests for the wire protocol codecs."""
+
+import numpy as np
+import pytest
+from mpipy.protocol import FLAG_LZ4, MsgType, compress_parts, decode_payload, encode_parts, encode_payload
+
+
+def test_ndarray_roundtrip():
+    arr = np.arange(12, dtype=np.float64).reshape(3, 4)
+    msg_type, payload = encode_payload(arr)
+    assert msg_type == MsgType.NDARRAY
+    result = decode_payload(msg_type, bytearray(payload))
+    np.testing.assert_array_equal(result, arr)
+    assert result.dtype == arr.dtype
+    result[0, 0] = -1.0
+
+
+def test_ndarray_non_contiguous_and_fortran():
+    arr = np.arange(30, dtype=np.int32).reshape(5, 6)
+    for view in (arr[1:4, 2:5], np.asfortranarray(arr), np.empty((0, 3))):
+        msg_type, payload = encode_payload(view)
+        np.testing.assert_array_equal(decode_payload(msg_type, payload), view)
+
+
+def test_non_array_payloads_use_pickle():
+    for obj in ((3, 4, 5, np.dtype("float64")), {"rank": 1}, None, np.array([{"a": 1}], dtype=object)):
+        msg_type, payload = encode_payload(obj)
+        assert msg_type == MsgType.DATA
+        result = decode_payload(msg_type, payload)
+        if isinstance(obj, np.ndarray):
+            assert result[0] == obj[0]
+        else:
+            assert result == obj
+
+
+def test_bytes_like_payloads_skip_pickle():
+    for obj, msg_type, expected in (
+        (b"abc", MsgType.BYTES, b"abc"),
+        (bytearray(b"abc"), MsgType.BYTEARRAY, bytearray(b"abc")),
+        (memoryview(b"abcdef")[::2], MsgType.BYTEARRAY, bytearray(b"ace")),
+    ):
+        got_type, payload = encode_payload(obj)
+        assert got_type == msg_type
+        result = decode_payload(got_type, payload)
+        assert type(result) is type(expected) and result == expected
+
+
+def test_large_arrays_inside_objects_go_out_of_band():
+    big = np.arange(1 << 15, dtype=np.float64)
+    obj = {1: big, 2: np.asfortranarray(big.reshape(256, 128)), 3: np.arange(3), "x": "y"}
+    msg_type, payload = encode_payload(obj)
+    assert msg_type == MsgType.PICKLE_OOB
+    result = decode_payload(msg_type, bytearray(payload))
+    assert result.keys() == obj.keys()
+    for key in (1, 2, 3):
+        np.testing.assert_array_equal(result[key], obj[key])
+    assert result[2].flags.f_contiguous
+
+
+def test_lz4_compressed_payload_roundtrip():
+    pytest.importorskip("lz4")
+    arr = np.zeros((256, 128))
+    msg_type, parts = compress_parts(*encode_parts(arr))
+    assert msg_type == MsgType.NDARRAY | FLAG_LZ4
+    result = decode_payload(msg_type, b"".join(parts))
+    np.testing.assert_array_equal(result, arr)
+    result[0, 0] = 1.0
+    # incompressible and small payloads are left alone
+    noise = np.random.default_rng(0).random(1 << 13)
+    assert compress_parts(*encode_parts(noise))[0] == MsgType.NDARRAY
+    assert compress_parts(*encode_parts(b"abc"))[0] == MsgType.BYTES
+
+
+def test_decoded_ndarray_is_aligned_and_owns_its_memory():
+    arr = np.arange(5, dtype=np.float64)
+    msg_type, payload = encode_payload(arr)
+    # the descriptor for "<f8" leaves the data at an offset that is not a multiple of 8
+    assert len(payload) % 8
+    result = decode_payload(msg_type, bytearray(payload))
+    assert result.flags.aligned and result.flags.owndata and result.flags.writeable
+    np.testing.assert_array_equal(result, arr)
+    empty_type, empty = encode_payload(np.zeros((0, 3)))
+    assert decode_payload(empty_type, empty).shape == (0, 3)
@@ -0,0 +1,240 @@
+"""Collective tests over a loopback world of real transports."""
+
+import pickle
+import threading
+
+import numpy as np
+import pytest
+from mpipy.protocol import HEADER_STRUCT, MsgType, encode_parts, pack_message
+from mpipy import runtime
+from mpipy.config import clear_config, configure_infra
+from mpipy.matmul import _matmul_distributed
+from mpipy.runtime import Comm, _collective_tree, node_of
+from mpipy.transport import MasterRouter, Message, TransportError, _Mailbox, connect_to_master, decode_args
+
+
+def run_world(size, fn, ranks_per_node=None):
+    router = MasterRouter("127.0.0.1", 0, expected_workers=size - 1)
+    results = [None] * size
+
+    def worker(rank):
+        local = [r for r in range(1, size) if node_of(r, ranks_per_node) == node_of(rank, ranks_per_node)]
+        transport = connect_to_master("127.0.0.1", router.actual_port, rank, threading.Event(), local_ranks=local)
+        results[rank] = fn(Comm(rank=rank, size=size, transport=transport, ranks_per_node=ranks_per_node))
+
+    threads = [threading.Thread(target=worker, args=(r,), daemon=True) for r in range(1, size)]
+    for t in threads:
+        t.start()
+    router.accept_all(10.0)
+    results[0] = fn(Comm(rank=0, size=size, transport=router, ranks_per_node=ranks_per_node))
+    for t in threads:
+        t.join(10.0)
+    return results
+
+
+@pytest.mark.parametrize("ranks_per_node", [None, 2, 3])
+def test_collectives_from_every_root(ranks_per_node):
+    size = 7
+
+    def job(comm):
+        out = []
+        for root in range(comm.size):
+            out.append(comm.bcast(("v", root) if comm.rank == root else None, root=root))
+            out.append(comm.scatter([r * 10 + root for r in range(comm.size)] if comm.rank == root else None, root=root))
+            out.append(comm.gather(comm.rank * 100 + root, root=root))
+            comm.barrier()
+        return out
+
+    results = run_world(size, job, ranks_per_node=ranks_per_node)
+    for rank, out in enumerate(results):
+        for root in range(size):
+            bcast, scatter, gather = out[3 * root:3 * root + 3]
+            assert bcast == ("v", root)
+            assert scatter == rank * 10 + root
+            assert gather == ([r * 100 + root for r in range(size)] if rank == root else None)
+
+
+def test_bcast_over_subset_of_ranks():
+    def job(comm):
+        row = [1, 3, 4] if comm.rank in (1, 3, 4) else None
+        if row is None:
+            return None
+        return comm.bcast("panel" if comm.rank == 3 else None, root=3, ranks=row, tag=50)
+
+    assert run_world(5, job) == [None, "panel", None, "panel", "panel"]
+
+
+def test_nonblocking_ops_preserve_order():
+    def job(comm):
+        if comm.rank == 0:
+            reqs = [comm.isend(i, dest=1, tag=7) for i in range(20)]
+            comm.send("last", dest=1, tag=7)
+            for req in reqs:
+                req.wait()
+            return comm.ibcast("x", root=0, tag=8).wait()
+        if comm.rank == 1:
+            reqs = [comm.irecv(source=0, tag=7) for _ in range(21)]
+            received = [req.wait() for req in reqs]
+            assert received == list(range(20)) + ["last"]
+        return comm.ibcast(None, root=0, tag=8).wait()
+
+    assert run_world(3, job) == ["x", "x", "x"]
+
+
+def test_deferred_request_wait_honours_timeout():
+    def job(comm):
+        if comm.rank == 1:
+            req = comm.irecv(source=0, tag=99)
+            with pytest.raises(TimeoutError):
+                req.wait(timeout=0.05)
+            comm.send("ready", dest=0, tag=98)
+            # the timed-out request is still pending and can be waited on again
+            return req.wait(timeout=5.0)
+        comm.recv(source=1, tag=98)
+        comm.send("late", dest=1, tag=99)
+        return None
+
+    assert run_world(2, job)[1] == "late"
+
+
+def test_large_forwarded_frame_does_not_stall_other_ranks():
+    arr = np.arange(1 << 16, dtype=np.float64)
+    msg_type, parts = encode_parts(arr)
+    payload = b"".join(parts)
+    half = len(payload) // 2
+
+    def job(comm):
+        # every rank is on its own node, so all traffic goes through the router
+        if comm.rank == 1:
+            sock = comm._transport.sock
+            with comm._transport._send_locks[sock]:
+                sock.sendall(HEADER_STRUCT.pack(len(payload), msg_type, 1, 2, 7) + payload[:half])
+                # the router is now mid-frame on this socket; rank 3 still gets through
+                assert comm.recv(source=3, tag=8, timeout=5.0) == "past"
+                sock.sendall(payload[half:])
+            return None
+        if comm.rank == 3:
+            comm.send("past", dest=1, tag=8)
+        if comm.rank == 2:
+            return comm.recv(source=1, tag=7, timeout=5.0)
+        return None
+
+    np.testing.assert_array_equal(run_world(4, job)[2], arr)
+
+
+def test_bad_frames_fail_only_their_recv():
+    descriptor = encode_parts(np.zeros(10))[1][0]
+
+    def job(comm):
+        if comm.rank in (1, 2):
+            sock = comm._transport.sock
+            with comm._transport._send_locks[sock]:
+                if comm.rank == 1:
+                    sock.sendall(pack_message(MsgType.DATA, 1, 0, 5, b"not a pickle"))
+                else:
+                    # the descriptor announces 80 bytes of data but only 16 follow
+                    sock.sendall(pack_message(MsgType.NDARRAY, 2, 0, 5, descriptor + bytes(16)))
+            if comm.rank == 1:
+                comm.send("ok", dest=0, tag=6)
+            return None
+        with pytest.raises(pickle.UnpicklingError):
+            comm.recv(source=1, tag=5, timeout=5.0)
+        with pytest.raises(TransportError):
+            comm.recv(source=2, tag=5, timeout=5.0)
+        return comm.recv(source=1, tag=6, timeout=5.0)
+
+    assert run_world(3, job)[0] == "ok"
+
+
+def _double(x):
+    return 2 * x
+
+
+def test_unpicklable_run_args_leave_runtime_usable(monkeypatch):
+    launched = []
+
+    def fake_launch(cfg, host, port, module, function):
+        # stands in for the ssh launcher: in-process workers that take their args and join the barrier
+        size = cfg.num_worker_nodes * cfg.per_node_cores + 1
+
+        def worker(rank):
+            transport = connect_to_master(host, port, rank, threading.Event())
+            decode_args(transport.recv_run_args(timeout=5.0))
+            Comm(rank=rank, size=size, transport=transport).barrier()
+
+        for rank in range(1, size):
+            threading.Thread(target=worker, args=(rank,), daemon=True).start()
+        launched.append(size)
+        return size
+
+    monkeypatch.setattr(runtime, "launch_workers", fake_launch)
+    configure_infra(master_node="127.0.0.1", per_node_cores=2, per_node_threads=None, hosts=["127.0.0.1"])
+    try:
+        with pytest.raises(TypeError):
+            runtime.run(_double, threading.Lock())
+        # the args failed before any worker was started, and the job slot is free again
+        assert launched == []
+        assert runtime.run(_double, 21) == 42
+        assert launched == [3]
+    finally:
+        clear_config()
+
+
+@pytest.mark.parametrize("size, ranks_per_node", [(2, None), (4, None), (5, 2), (7, 3), (9, 4)])
+def test_distributed_matmul_matches_numpy(size, ranks_per_node):
+    rng = np.random.default_rng(size)
+    # uneven shapes leave some grid blocks smaller than others
+    a = rng.random((37, 23))
+    b = rng.random((23, 29))
+
+    def job(comm):
+        root = comm.rank == 0
+        return _matmul_distributed(comm, a if root else None, b if root else None)
+
+    results = run_world(size, job, ranks_per_node=ranks_per_node)
+    np.testing.assert_allclose(results[0], a @ b)
+    assert results[1:] == [None] * (size - 1)
+
+
+def test_collective_tree_keeps_cross_node_edges_between_leaders():
+    tree = _collective_tree(0, tuple(range(7)), 3)
+    # nodes: {0}, {1, 2, 3}, {4, 5, 6}; only leaders 1 and 4 talk to rank 0's node
+    assert set(tree[0][1]) == {1, 4}
+    for rank in (2, 3):
+        assert node_of(tree[rank][0], 3) == node_of(rank, 3)
+
+
+def test_mailbox_matches_oldest_across_tags():
+    mailbox = _Mailbox()
+    for i, (src, tag) in enumerate([(1, 5), (2, 6), (1, 6), (2, 5)]):
+        mailbox.put(Message(src=src, dest=0, tag=tag, payload=i))
+    assert mailbox.get(6, None, 1).payload == 1
+    assert mailbox.get(None, 1, 1).payload == 0
+    assert mailbox.get(None, None, 1).payload == 2
+    assert mailbox.get(5, 2, 1).payload == 3
+    with pytest.raises(TimeoutError):
+        mailbox.get(None, None, 0.01)
+
+
+def test_mpi_backend_single_rank():
+    pytest.importorskip("mpi4py")
+    np = pytest.importorskip("numpy")
+    from mpipy.mpi_backend import MPIComm
+
+    comm = MPIComm()
+    if comm.size != 1:
+        pytest.skip("runs as a singleton MPI process")
+    arr = np.arange(6, dtype=np.float32).reshape(2, 3)
+    np.testing.assert_array_equal(comm.bcast(arr), arr)
+    np.testing.assert_array_equal(comm.gather(arr)[0], arr)
+    np.testing.assert_array_equal(comm.scatter([arr]), arr)
+    assert comm.bcast({"a": 1}) == {"a": 1}
+
+
+def test_mpi_backend_not_loaded_outside_mpiexec(monkeypatch):
+    from mpipy import mpi_backend
+
+    for name in mpi_backend._MPIEXEC_ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(mpi_backend, "_load_mpi", lambda: pytest.fail("mpi4py imported outside mpiexec"))
+    assert not mpi_backend.available()